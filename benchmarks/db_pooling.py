@@ -0,0 +1,47 @@
+"""
+Measures the request latency of the production profile with a new database connection per
+request, persistent connections and the psycopg connection pool.
+
+Needs the PostgreSQL database of the POSTGRES_* environment variables:
+
+    python -m benchmarks.db_pooling --path /api/cats/ --requests 2000 --concurrency 16
+"""
+import argparse
+import json
+from pathlib import Path
+
+from .loadgen import gunicorn_command, run_load, running_server
+
+MODES = {
+    'no reuse': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL': '0'},
+    'pool': {'DB_POOL': '1'},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/cats/')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=8110)
+    parser.add_argument('--settings', default='exhibition.settings.production')
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args()
+
+    url = f'http://127.0.0.1:{args.port}{args.path}'
+    results = []
+    for mode, env in MODES.items():
+        with running_server(gunicorn_command(args.port), url, DJANGO_SETTINGS_MODULE=args.settings, **env):
+            run_load(url, requests=min(100, args.requests), concurrency=args.concurrency)
+            results.append({'mode': mode, **run_load(url, requests=args.requests, concurrency=args.concurrency)})
+
+    print(f'{"mode":<12} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for result in results:
+        print(f'{result["mode"]:<12} {result["rps"]:>9} {result["p50_ms"]:>8} {result["p99_ms"]:>8} {result["errors"]:>7}')
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
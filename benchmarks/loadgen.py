@@ -0,0 +1,136 @@
+"""
+Closed-loop HTTP load generator shared by the benchmarks.
+
+Every client thread keeps one connection open and sends the next request as soon as
+the previous response is read.
+"""
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed, errors=0):
+    '''Throughput and latency percentiles (in milliseconds) of a finished run.'''
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_load(url, requests=1000, concurrency=8, method='GET', body=None, headers=None, timeout=10):
+    '''Sends requests to url from concurrency threads and returns summarize() of the run.'''
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    return run_requests(
+        url, lambda number: (method, path, body, headers or {}), requests, concurrency, timeout
+    )
+
+
+def run_requests(url, make_request, requests=1000, concurrency=8, timeout=10):
+    """Sends requests to the server of url from concurrency threads, returns summarize() of the run.
+
+    make_request(number) returns the (method, path, body, headers) of the number-th request,
+    so a scenario can spread its requests over different resources.
+    """
+    parts = urlsplit(url)
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def client():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        while True:
+            with lock:
+                number = next(remaining, None)
+            if number is None:
+                break
+            method, path, body, headers = make_request(number)
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                failed = response.status >= 400
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                if failed:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed)
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def wait_until_ready(url, timeout=30):
+    '''Polls url until the server answers, raises RuntimeError after timeout seconds.'''
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+            connection.request('GET', parts.path or '/')
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up within {timeout} seconds.')
+
+
+def gunicorn_command(port):
+    return [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}']
+
+
+@contextmanager
+def running_server(command, url, **env):
+    """Starts a server process from the project directory and stops it on exit.
+
+    The keyword arguments are added to the environment. DJANGO_SECRET_KEY defaults to a dummy
+    value and CACHE_DIR to a new temporary directory, so the production settings can be used
+    without Redis.
+    """
+    with tempfile.TemporaryDirectory(prefix='exhibition-cache-') as cache_dir:
+        env = {
+            'DJANGO_SECRET_KEY': 'benchmark', 'GUNICORN_ACCESS_LOG': '', 'CACHE_DIR': cache_dir,
+            **os.environ, **env
+        }
+        server = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_ready(url)
+            yield server
+        finally:
+            server.terminate()
+            server.wait()
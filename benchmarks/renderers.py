@@ -0,0 +1,89 @@
+"""
+Compares DRF's JSONRenderer with the orjson backed FastJSONRenderer on a large CatSerializer
+payload: encoding time (best of --repeat runs with timeit) and memory allocated while
+encoding (tracemalloc), plus the parse time of the same document.
+
+    python -m benchmarks.renderers --cats 10000
+
+No database is needed, the cats are built in memory.
+"""
+import argparse
+import json
+import os
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import django
+
+
+def build_payload(count):
+    from django.contrib.auth.models import User
+
+    from cats.models import Breed, Cat
+    from cats.serializers import CatSerializer
+
+    breeds = [Breed(id=i, name=f'breed {i}') for i in range(20)]
+    owners = [User(id=i, username=f'owner{i}') for i in range(100)]
+    cats = [
+        Cat(
+            id=i, name=f'Cat {i}', age=1 + i % 240, color='grey', description='hell of a cat',
+            breed=breeds[i % 20], owner=owners[i % 100], rating_count=i % 7, rating_sum=(i % 7) * 7.5,
+        )
+        for i in range(count)
+    ]
+    return CatSerializer(cats, many=True).data
+
+
+def measure(function, number, repeat):
+    seconds = min(timeit.repeat(function, number=number, repeat=repeat)) / number
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ms': round(seconds * 1000, 3), 'peak_kib': round(peak / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cats', type=int, default=10000)
+    parser.add_argument('--number', type=int, default=5, help='Runs per timing.')
+    parser.add_argument('--repeat', type=int, default=5, help='Timings, the best one is reported.')
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'exhibition.settings')
+    django.setup()
+    from io import BytesIO
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from exhibition.renderers import FastJSONParser, FastJSONRenderer
+
+    data = build_payload(args.cats)
+    document = JSONRenderer().render(data)
+    results = {}
+    for name, renderer, parser_class in (
+        ('json', JSONRenderer(), JSONParser),
+        ('orjson', FastJSONRenderer(), FastJSONParser),
+    ):
+        assert renderer.render(data) == document
+        results[name] = {
+            'render': measure(lambda: renderer.render(data), args.number, args.repeat),
+            'parse': measure(lambda: parser_class().parse(BytesIO(document)), args.number, args.repeat),
+        }
+
+    print(f'{args.cats} cats, {len(document) / 1024:.0f} KiB of JSON')
+    print(f'{"backend":<8} {"render ms":>10} {"render peak KiB":>16} {"parse ms":>9} {"parse peak KiB":>15}')
+    for name, result in results.items():
+        print(
+            f'{name:<8} {result["render"]["ms"]:>10} {result["render"]["peak_kib"]:>16} '
+            f'{result["parse"]["ms"]:>9} {result["parse"]["peak_kib"]:>15}'
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps({'cats': args.cats, 'bytes': len(document), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Scripted load scenarios of the main API operations against a seeded database:
+
+    list     GET /api/cats/
+    detail   GET /api/cat/details/<id> over the seeded cats
+    add      POST /api/cat/add/
+    update   PATCH /api/cat/details/<id> of the cats of one user
+    rate     POST /api/cat/rate/, a new user rates every cat once
+    token    POST /api/token/
+    refresh  POST /api/token/refresh/
+
+Seed the database first, the scenarios log in as the generated user bench_0:
+
+    python manage.py seed_data --clear --cats 5000 --seed 1
+    python -m benchmarks.scenarios --json results.json
+
+Without --url a gunicorn server with the production settings is started for the run.
+DB_ENGINE=sqlite runs both steps on a local SQLite file, no external service needed. The
+JSON file holds the commit and the throughput and p50/p95/p99 latency of every scenario,
+so runs can be compared between commits.
+"""
+import argparse
+import json
+import http.client
+import os
+import subprocess
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .loadgen import BASE_DIR, gunicorn_command, run_load, run_requests, running_server
+
+SCENARIOS = ('list', 'detail', 'add', 'update', 'rate', 'token', 'refresh')
+
+
+def request_json(url, method, path, payload=None, token=None):
+    parts = urlsplit(url)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    try:
+        connection.request(method, path, body=json.dumps(payload) if payload is not None else None, headers=headers)
+        response = connection.getresponse()
+        data = response.read()
+    finally:
+        connection.close()
+    if response.status >= 400:
+        raise RuntimeError(f'{method} {path} answered {response.status}: {data[:200]!r}')
+    return json.loads(data) if data else None
+
+
+class Scenarios:
+    '''Prepares the data a scenario needs and builds its requests.'''
+
+    def __init__(self, url, username, password):
+        self.url = url
+        self.credentials = {'username': username, 'password': password}
+        tokens = request_json(url, 'POST', '/api/token/', self.credentials)
+        self.access, self.refresh = tokens['access'], tokens['refresh']
+
+    def auth_headers(self, token=None):
+        return {'Content-Type': 'application/json', 'Authorization': f'Bearer {token or self.access}'}
+
+    def cat_ids(self, count):
+        ids = []
+        path = '/api/cats/?page_size=500'
+        while path and len(ids) < count:
+            page = request_json(self.url, 'GET', path)
+            ids.extend(cat['id'] for cat in page.get('results', []))
+            path = urlsplit(page['next'])._replace(scheme='', netloc='').geturl() if page.get('next') else None
+        if not ids:
+            raise RuntimeError('There are no cats, run manage.py seed_data first.')
+        return ids[:count]
+
+    def new_cat(self, number):
+        return {'name': f'Bench {number}', 'age': 1 + number % 240, 'color': 'grey', 'breed': 'breed 0'}
+
+    def prepare(self, name, requests, concurrency):
+        '''Returns the make_request function and the number of requests of a scenario.'''
+        if name == 'list':
+            return lambda number: ('GET', '/api/cats/', None, {}), requests
+        if name == 'detail':
+            ids = self.cat_ids(requests)
+            return lambda number: ('GET', f'/api/cat/details/{ids[number % len(ids)]}', None, {}), requests
+        if name == 'add':
+            headers = self.auth_headers()
+            return lambda number: ('POST', '/api/cat/add/', json.dumps(self.new_cat(number)), headers), requests
+        if name == 'update':
+            headers = self.auth_headers()
+            ids = [
+                request_json(self.url, 'POST', '/api/cat/add/', self.new_cat(number), self.access)['id']
+                for number in range(concurrency)
+            ]
+            return lambda number: (
+                'PATCH', f'/api/cat/details/{ids[number % len(ids)]}',
+                json.dumps({'age': 1 + number % 240}), headers
+            ), requests
+        if name == 'rate':
+            # A user rates a cat only once, so a new user rates up to requests different cats.
+            rater = {'username': f'bench_rater_{time.time_ns()}', 'password': self.credentials['password']}
+            request_json(self.url, 'POST', '/api/user/register/', rater)
+            headers = self.auth_headers(request_json(self.url, 'POST', '/api/token/', rater)['access'])
+            ids = self.cat_ids(requests)
+            return lambda number: (
+                'POST', '/api/cat/rate/', json.dumps({'cat': ids[number], 'value': 1 + number % 10}), headers
+            ), len(ids)
+        if name == 'token':
+            body = json.dumps(self.credentials)
+            headers = {'Content-Type': 'application/json'}
+            return lambda number: ('POST', '/api/token/', body, headers), requests
+        if name == 'refresh':
+            body = json.dumps({'refresh': self.refresh})
+            headers = {'Content-Type': 'application/json'}
+            return lambda number: ('POST', '/api/token/refresh/', body, headers), requests
+        raise ValueError(f'Unknown scenario {name}.')
+
+
+def run_scenarios(url, names, requests, concurrency, username, password):
+    run_load(f'{url}/api/cats/', requests=min(100, requests), concurrency=concurrency)
+    scenarios = Scenarios(url, username, password)
+    results = {}
+    for name in names:
+        make_request, count = scenarios.prepare(name, requests, concurrency)
+        results[name] = run_requests(url, make_request, count, concurrency)
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', help=f'Any of {", ".join(SCENARIOS)}, all by default.')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--url', help='Benchmark this running server instead of starting gunicorn.')
+    parser.add_argument('--port', type=int, default=8120)
+    parser.add_argument('--settings', default='exhibition.settings.production')
+    parser.add_argument('--username', default='bench_0')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'Unknown scenarios: {", ".join(sorted(unknown))}.')
+    args.scenarios = args.scenarios or SCENARIOS
+
+    if args.url:
+        url = args.url.rstrip('/')
+        results = run_scenarios(url, args.scenarios, args.requests, args.concurrency, args.username, args.password)
+    else:
+        url = f'http://127.0.0.1:{args.port}'
+        with running_server(gunicorn_command(args.port), f'{url}/api/breeds/', DJANGO_SETTINGS_MODULE=args.settings):
+            results = run_scenarios(url, args.scenarios, args.requests, args.concurrency, args.username, args.password)
+
+    print(f'{"scenario":<10} {"requests":>9} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for name, result in results.items():
+        print(
+            f'{name:<10} {result["requests"]:>9} {result["rps"]:>9} {result["p50_ms"]:>8} '
+            f'{result["p95_ms"]:>8} {result["p99_ms"]:>8} {result["errors"]:>7}'
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            'commit': current_commit(),
+            'database': os.environ.get('DB_ENGINE', 'postgresql'),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'results': results,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
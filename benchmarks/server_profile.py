@@ -0,0 +1,57 @@
+"""
+Compares the throughput of the development server with the production gunicorn profile.
+
+Both servers run against the database configured by their settings module, seed it first
+(for example with a few hundred cats) to get a meaningful list endpoint:
+
+    python -m benchmarks.server_profile --path /api/cats/ --requests 2000 --concurrency 16
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .loadgen import gunicorn_command, run_load, running_server
+
+
+def benchmark(name, command, url, args, **env):
+    with running_server(command, url, **env):
+        run_load(url, requests=min(100, args.requests), concurrency=args.concurrency)
+        return {'server': name, **run_load(url, requests=args.requests, concurrency=args.concurrency)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/cats/')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--dev-settings', default='exhibition.settings')
+    parser.add_argument('--prod-settings', default='exhibition.settings.production')
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args()
+
+    runserver_url = f'http://127.0.0.1:{args.port}{args.path}'
+    gunicorn_url = f'http://127.0.0.1:{args.port + 1}{args.path}'
+    results = [
+        benchmark(
+            'runserver', [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{args.port}'],
+            runserver_url, args, DJANGO_SETTINGS_MODULE=args.dev_settings
+        ),
+        benchmark(
+            'gunicorn', gunicorn_command(args.port + 1),
+            gunicorn_url, args, DJANGO_SETTINGS_MODULE=args.prod_settings
+        ),
+    ]
+    print(f'{"server":<10} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for result in results:
+        print(
+            f'{result["server"]:<10} {result["rps"]:>9} {result["p50_ms"]:>8} '
+            f'{result["p95_ms"]:>8} {result["p99_ms"]:>8} {result["errors"]:>7}'
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Async versions of the hot read endpoints for the ASGI application.
+
+They use the async ORM directly so a burst of reads doesn't tie up one worker thread per
+request. The representations are the same as the DRF views, lists are paginated by ID
+with the after and page_size query parameters.
+
+rating_stream is the Server-Sent Events stream of the live rating updates.
+"""
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .events import broker
+from .models import Breed, Cat
+from .serializers import BreedSerializer, CatSerializer
+
+
+def get_page_size(request):
+    try:
+        page_size = int(request.GET['page_size'])
+    except (KeyError, ValueError):
+        return settings.API_PAGE_SIZE
+    return min(max(page_size, 1), settings.API_MAX_PAGE_SIZE)
+
+
+async def paginate_cats(request, queryset):
+    '''Returns the page of cats after the ID in the after parameter, fetching one extra row
+    to know whether there is a next page.'''
+    page_size = get_page_size(request)
+    after = request.GET.get('after', '')
+    if after.isdigit():
+        queryset = queryset.filter(id__gt=int(after))
+    cats = [cat async for cat in queryset.order_by('id')[:page_size + 1].aiterator()]
+
+    next_url = None
+    if len(cats) > page_size:
+        cats = cats[:page_size]
+        query = request.GET.copy()
+        query['after'] = cats[-1].id
+        next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+    return {'next': next_url, 'results': CatSerializer(cats, many=True).data}
+
+
+def not_found(model):
+    return JsonResponse({'detail': f'No {model.__name__} matches the given query.'}, status=404)
+
+
+async def cat_list(request):
+    page = await paginate_cats(request, Cat.objects.with_listing_data())
+    if not page['results'] and 'after' not in request.GET:
+        return JsonResponse({'msg': 'There are no cats yet.'})
+    return JsonResponse(page)
+
+
+async def cat_list_by_breed(request, breed_id):
+    if not await Breed.objects.filter(id=breed_id).aexists():
+        return not_found(Breed)
+    return JsonResponse(await paginate_cats(request, Cat.objects.with_listing_data().filter(breed_id=breed_id)))
+
+
+async def cat_details(request, pk):
+    try:
+        cat = await Cat.objects.with_listing_data().aget(pk=pk)
+    except Cat.DoesNotExist:
+        return not_found(Cat)
+    return JsonResponse(CatSerializer(cat).data)
+
+
+async def breed_list(request):
+    breeds = [breed async for breed in Breed.objects.order_by('id')]
+    return JsonResponse(BreedSerializer(breeds, many=True).data, safe=False)
+
+
+async def rating_event_stream(subscription, keepalive):
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            event = await subscription.get(timeout=keepalive)
+            if event is None:
+                # Keeps proxies from closing an idle connection.
+                yield ': keepalive\n\n'
+            else:
+                yield f'event: rating\ndata: {json.dumps(event)}\n\n'
+    finally:
+        subscription.close()
+
+
+async def rating_stream(request):
+    # Under WSGI Django collects an async stream into a list before sending it, this one
+    # never ends, so it would hold a worker thread forever and never deliver an event.
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'The rating stream is only served by the ASGI application (SERVER_MODE=asgi).'},
+            status=501
+        )
+    response = StreamingHttpResponse(
+        rating_event_stream(broker.subscribe(), settings.RATING_EVENTS_KEEPALIVE),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
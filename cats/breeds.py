@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from exhibition.metrics import record_cache_lookup
+
+from .cache import bump_cache_version
+from .models import Breed
+
+
+class BreedResolver:
+    '''Per-process LRU cache of breed name -> ID for the cat write paths.
+
+    Breeds are a small, almost static set, so a warm cache saves the get_or_create
+    query on every write. The signal handlers clear it whenever a breed changes.
+    '''
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or settings.BREED_CACHE_SIZE
+        self.hits = 0
+        self.misses = 0
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'maxsize': self.maxsize, 'size': len(self._ids)}
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def _lookup(self, name):
+        with self._lock:
+            breed_id = self._ids.get(name)
+            if breed_id is None:
+                self.misses += 1
+            else:
+                self._ids.move_to_end(name)
+                self.hits += 1
+        record_cache_lookup('breeds', breed_id is not None)
+        return breed_id
+
+    def _remember(self, breeds):
+        with self._lock:
+            for breed in breeds:
+                self._ids[breed.name] = breed.id
+                self._ids.move_to_end(breed.name)
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def _remember_on_commit(self, breeds):
+        # Only cache what is committed, a breed created in a transaction that rolls back
+        # must not stay cached.
+        breeds = list(breeds)
+        transaction.on_commit(lambda: self._remember(breeds))
+
+    def resolve(self, name):
+        '''Returns the breed with the given name, creating it if needed.'''
+        breed_id = self._lookup(name)
+        if breed_id is not None:
+            return Breed(id=breed_id, name=name)
+        breed, created = Breed.objects.get_or_create(name=name)
+        self._remember_on_commit([breed])
+        return breed
+
+    def resolve_many(self, names):
+        '''Returns a {name: breed} mapping, missing breeds are loaded and created in bulk.'''
+        breeds = {}
+        for name in set(names):
+            breed_id = self._lookup(name)
+            if breed_id is not None:
+                breeds[name] = Breed(id=breed_id, name=name)
+        missing = set(names) - breeds.keys()
+        if missing:
+            found = Breed.objects.in_bulk(missing, field_name='name')
+            missing -= found.keys()
+            if missing:
+                Breed.objects.bulk_create([Breed(name=name) for name in missing], ignore_conflicts=True)
+                found.update(Breed.objects.in_bulk(missing, field_name='name'))
+                # bulk_create sends no post_save, so the breed list is invalidated here.
+                bump_cache_version('breeds')
+            self._remember_on_commit(found.values())
+            breeds.update(found)
+        return breeds
+
+
+breed_resolver = BreedResolver()
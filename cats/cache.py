@@ -0,0 +1,158 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from exhibition.metrics import record_cache_lookup
+from rest_framework.response import Response
+
+
+def get_cache_version(namespace):
+    '''Returns the current version token of a namespace of cached responses.'''
+    return cache.get_or_set(f'version:{namespace}', uuid.uuid4().hex, timeout=None)
+
+
+def get_cache_versions(namespaces):
+    '''Returns the version tokens of several namespaces in one cache round-trip.'''
+    keys = [f'version:{namespace}' for namespace in namespaces]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_cache_version(namespace):
+    '''Moves a namespace to a new version so every response cached under the old one is ignored.
+
+    The version is bumped right away and again once the transaction commits, so a response
+    rendered from the old data in between is not kept either.
+    '''
+    def bump():
+        cache.set(f'version:{namespace}', uuid.uuid4().hex, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_cats(cat_ids=()):
+    '''Invalidates the cached cat lists and the details of the given cats.'''
+    for namespace in ['cats', *(f'cat:{cat_id}' for cat_id in cat_ids)]:
+        bump_cache_version(namespace)
+    mark_cats_changed()
+
+
+def mark_cats_changed():
+    # A cat deleted or moved out of a filtered list does not move that list's Max(updated_at),
+    # so the Last-Modified of the lists also depends on this. Kept like the namespace versions.
+    def mark():
+        cache.set('cats:changed_at', timezone.now(), timeout=None)
+
+    mark()
+    transaction.on_commit(mark)
+
+
+def record_cache_access(hit):
+    # Kept in the shared cache so the ratio covers every worker.
+    record_cache_lookup('response', hit)
+    key = 'stats:hits' if hit else 'stats:misses'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    stats = cache.get_many(['stats:hits', 'stats:misses'])
+    hits, misses = stats.get('stats:hits', 0), stats.get('stats:misses', 0)
+    return {'hits': hits, 'misses': misses, 'ratio': hits / (hits + misses) if hits + misses else 0.0}
+
+
+def make_etag(data):
+    '''Strong ETag of a serialized representation.'''
+    content = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return '"%s"' % hashlib.md5(content.encode()).hexdigest()
+
+
+def cat_list_version(queryset):
+    """Returns the (last modified, version token) of a list of cats with one aggregate query.
+
+    The token is the version of the 'cats' namespace, which every change to a cat bumps,
+    deletions and cats moving out of a filtered list included.
+    """
+    last_modified = queryset.order_by().aggregate(last_modified=Max('updated_at'))['last_modified']
+    last_modified = max(filter(None, [last_modified, cache.get('cats:changed_at')]), default=None)
+    return last_modified, get_cache_version('cats')
+
+
+class ConditionalGetMixin:
+    """Adds ETag and Last-Modified to GET responses and answers matching conditional requests
+    with a 304 after the version query alone, without running the view.
+
+    Views implement get_resource_version() returning (last modified, version token), or None
+    when the resource doesn't exist.
+    """
+
+    def get_resource_version(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        version = self.get_resource_version()
+        if version is None:
+            return super().get(request, *args, **kwargs)
+
+        last_modified, token = version
+        # The same version renders differently per page and query parameters.
+        etag = make_etag([request.get_full_path(), token])
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class CachedResponseMixin:
+    """Caches successful GET responses in the shared cache until one of their namespaces changes.
+
+    The cached data carries a strong ETag, a matching If-None-Match gets a 304. Views list the
+    namespaces they depend on in cache_namespaces or get_cache_namespaces(), the signal
+    handlers in cats.signals bump them.
+    """
+
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def get(self, request, *args, **kwargs):
+        versions = get_cache_versions(self.get_cache_namespaces())
+        key = 'response:' + hashlib.md5(json.dumps([request.get_full_path(), versions]).encode()).hexdigest()
+
+        cached = cache.get(key)
+        record_cache_access(hit=cached is not None)
+        if cached is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200 or not isinstance(response, Response):
+                return response
+            cached = (response.data, make_etag(response.data))
+            cache.set(key, cached, settings.API_CACHE_TIMEOUT)
+        data, etag = cached
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        return Response(data, headers={'ETag': etag})
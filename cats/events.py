@@ -0,0 +1,182 @@
+"""
+Live rating updates for the scoreboard screens.
+
+Every accepted rating publishes a {cat_id, average_rating, rating_count} event once its
+transaction commits. The in-process broker fans the events out to the Server-Sent Events
+streams connected to this worker. With several workers RATING_EVENTS_BACKEND relays the
+events between them: 'redis' (PUBLISH/SUBSCRIBE on REDIS_URL) or 'postgres'
+(NOTIFY/LISTEN on the default database). Each worker then holds one listening connection,
+not one per connected screen.
+"""
+import asyncio
+import json
+import logging
+import threading
+from functools import cached_property
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Cat
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cat_ratings'
+
+
+class Subscription:
+    '''The event queue of one connected stream.'''
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        # Called on the subscriber's event loop, a screen that can't keep up loses events.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        '''Returns the next event, or None when nothing arrived within timeout seconds.'''
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBackend:
+    '''Delivers the events to the streams of this process only.'''
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, events):
+        for event in events:
+            self.broker.deliver(event)
+
+    async def listen(self):
+        pass
+
+
+class RedisBackend(LocalBackend):
+
+    @cached_property
+    def client(self):
+        import redis
+
+        return redis.Redis.from_url(settings.REDIS_URL)
+
+    def publish(self, events):
+        for event in events:
+            self.client.publish(CHANNEL, json.dumps(event))
+
+    async def listen(self):
+        import redis.asyncio
+
+        pubsub = redis.asyncio.Redis.from_url(settings.REDIS_URL).pubsub()
+        await pubsub.subscribe(CHANNEL)
+        async for message in pubsub.listen():
+            if message['type'] == 'message':
+                self.broker.deliver(json.loads(message['data']))
+
+
+class PostgresBackend(LocalBackend):
+
+    def publish(self, events):
+        with connection.cursor() as cursor:
+            for event in events:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(event)])
+
+    async def listen(self):
+        import psycopg
+        from psycopg.conninfo import make_conninfo
+
+        database = settings.DATABASES['default']
+        conninfo = make_conninfo(
+            dbname=database['NAME'], user=database['USER'], password=database['PASSWORD'],
+            host=database['HOST'], port=database['PORT']
+        )
+        async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as listener:
+            await listener.execute(f'LISTEN {CHANNEL}')
+            async for notify in listener.notifies():
+                self.broker.deliver(json.loads(notify.payload))
+
+
+BACKENDS = {
+    'local': LocalBackend,
+    'redis': RedisBackend,
+    'postgres': PostgresBackend,
+}
+
+
+class RatingBroker:
+    '''Fans rating events out to the subscribed streams of this process.'''
+
+    def __init__(self, backend='local', queue_size=100):
+        self.backend = BACKENDS[backend](self)
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        '''Registers a stream, must be called from its event loop.'''
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            listener = self._listeners.get(subscription.loop)
+            if listener is None or listener.done():
+                self._listeners[subscription.loop] = subscription.loop.create_task(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    async def _listen(self):
+        try:
+            await self.backend.listen()
+        except Exception:
+            logger.exception('Rating event listener stopped.')
+
+    def deliver(self, event):
+        '''Hands an event to every local stream, from any thread.'''
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+    def publish(self, events):
+        try:
+            self.backend.publish(events)
+        except Exception:
+            # The rating is stored already, the screens catch up with the next one.
+            logger.exception('Failed to publish rating events.')
+
+
+broker = RatingBroker(settings.RATING_EVENTS_BACKEND, settings.RATING_EVENTS_QUEUE_SIZE)
+
+
+def rating_events(cat_ids):
+    cats = Cat.objects.filter(pk__in=set(cat_ids)).values('id', 'rating_count', 'rating_sum')
+    return [
+        {
+            'cat_id': cat['id'],
+            'average_rating': round(cat['rating_sum'] / cat['rating_count'], 1) if cat['rating_count'] else 0.0,
+            'rating_count': cat['rating_count'],
+        }
+        for cat in cats
+    ]
+
+
+def publish_rating_updates(cat_ids):
+    '''Publishes the new averages of the given cats once the current transaction commits.'''
+    cat_ids = list(cat_ids)
+    transaction.on_commit(lambda: broker.publish(rating_events(cat_ids)))
@@ -0,0 +1,73 @@
+import csv
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Breed, Cat, Rating
+
+# Columns of every exportable table, the first one is the primary key.
+EXPORT_TABLES = {
+    'breeds': (Breed, ['id', 'name']),
+    'cats': (Cat, ['id', 'name', 'age', 'color', 'description', 'breed_id', 'owner_id', 'rating_count', 'rating_sum']),
+    'ratings': (Rating, ['id', 'user_id', 'cat_id', 'value']),
+}
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+class Echo:
+    '''File-like object whose write() returns the data so csv.writer can feed a generator.'''
+
+    def write(self, value):
+        return value
+
+
+def stream_json_array(queryset, serializer, chunk_size=None):
+    '''Yields the queryset as a JSON array, one chunk of serialized objects at a time.'''
+    chunk_size = chunk_size or settings.API_STREAM_CHUNK_SIZE
+    encoder = JSONEncoder()
+    yield '['
+    chunk = []
+    separator = ''
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(encoder.encode(serializer.to_representation(obj)))
+        if len(chunk) == chunk_size:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+    yield ']'
+
+
+def export_rows(table, since_id=None, chunk_size=None):
+    '''Iterates the rows of an exported table in primary key order.
+
+    QuerySet.iterator() reads through a server-side cursor on PostgreSQL, so only
+    chunk_size rows are held in memory. With since_id only newer rows are returned.
+    '''
+    model, columns = EXPORT_TABLES[table]
+    queryset = model.objects.order_by('pk').values_list(*columns)
+    if since_id is not None:
+        queryset = queryset.filter(pk__gt=since_id)
+    return queryset.iterator(chunk_size=chunk_size or settings.API_STREAM_CHUNK_SIZE)
+
+
+def stream_ndjson(table, since_id=None):
+    columns = EXPORT_TABLES[table][1]
+    encoder = JSONEncoder()
+    for row in export_rows(table, since_id):
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+
+def stream_csv(table, since_id=None):
+    columns = EXPORT_TABLES[table][1]
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in export_rows(table, since_id):
+        yield writer.writerow(row)
+
+
+def stream_export(table, export_format, since_id=None):
+    if export_format == 'csv':
+        return stream_csv(table, since_id)
+    return stream_ndjson(table, since_id)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from cats.cache import get_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Reports the hit ratio of the cached API responses across all workers.'
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+        self.stdout.write(f'Hits: {stats["hits"]}, misses: {stats["misses"]}, hit ratio: {stats["ratio"]:.1%}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from cats.exports import EXPORT_FORMATS, EXPORT_TABLES, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Exports the breeds, cats or ratings table as newline-delimited JSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(EXPORT_TABLES))
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument(
+            '--since-id', type=int, default=None,
+            help='Only export rows with a greater primary key, for incremental syncs.'
+        )
+        parser.add_argument('--output', default=None, help='File to write to instead of stdout.')
+
+    def handle(self, *args, **options):
+        lines = stream_export(options['table'], options['export_format'], options['since_id'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cats.models import Cat
+
+
+class Command(BaseCommand):
+    help = 'Recalculates the stored rating count and sum of every cat from the Rating table.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Cat.objects.rebuild_rating_aggregates()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates for {updated} cats.'))
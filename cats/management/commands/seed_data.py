@@ -0,0 +1,85 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cats.cache import bump_cache_version, invalidate_cats
+from cats.models import Breed, Cat, Rating
+
+NAMES = ('Tom', 'Kate', 'Sam', 'Chuck', 'Luna', 'Milo', 'Oliver', 'Bella', 'Simba', 'Nala', 'Leo', 'Cleo')
+COLORS = ('black', 'white', 'grey', 'ginger', 'cream', 'tabby', 'calico', 'tortoiseshell')
+WORDS = ('fluffy', 'lazy', 'playful', 'shy', 'loud', 'curious', 'gentle', 'grumpy', 'clever', 'sleepy')
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills the database with generated users, breeds, cats and ratings for the benchmarks. '
+        'The same seed always generates the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--breeds', type=int, default=20)
+        parser.add_argument('--cats', type=int, default=1000)
+        parser.add_argument('--ratings', type=int, default=5, help='Ratings per cat, each by another user.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--password', default='benchmark', help='Password of every generated user.')
+        parser.add_argument('--clear', action='store_true', help='Delete the cats, breeds, ratings and generated users first.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['ratings'] > options['users']:
+            options['ratings'] = options['users']
+
+        with transaction.atomic():
+            if options['clear']:
+                Rating.objects.all().delete()
+                Cat.objects.all().delete()
+                Breed.objects.all().delete()
+                User.objects.filter(username__startswith='bench_').delete()
+
+            # Hashing the password once keeps seeding fast, logging in still costs a full check.
+            password = make_password(options['password'])
+            users = User.objects.bulk_create(
+                [User(username=f'bench_{i}', password=password) for i in range(options['users'])],
+                batch_size=1000
+            )
+            breeds = Breed.objects.bulk_create(
+                [Breed(name=f'breed {i}') for i in range(options['breeds'])],
+                batch_size=1000
+            )
+            cats = Cat.objects.bulk_create(
+                [
+                    Cat(
+                        name=rng.choice(NAMES),
+                        age=rng.randint(1, 240),
+                        color=rng.choice(COLORS),
+                        description=' '.join(rng.sample(WORDS, 3)),
+                        breed=rng.choice(breeds),
+                        owner=rng.choice(users),
+                    )
+                    for _ in range(options['cats'])
+                ],
+                batch_size=1000
+            )
+            Rating.objects.bulk_create(
+                [
+                    Rating(user=user, cat=cat, value=rng.randint(1, 10))
+                    for cat in cats
+                    for user in rng.sample(users, options['ratings'])
+                ],
+                batch_size=1000
+            )
+            # bulk_create skips Cat.save() and the rating signal handlers.
+            Cat.objects.rebuild_rating_aggregates()
+            Cat.objects.refresh_search_vector()
+            invalidate_cats()
+            bump_cache_version('breeds')
+            bump_cache_version('users')
+
+        self.stdout.write(
+            f'Seeded {len(users)} users, {len(breeds)} breeds, {len(cats)} cats and '
+            f'{len(cats) * options["ratings"]} ratings.'
+        )
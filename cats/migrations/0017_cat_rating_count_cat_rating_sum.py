@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    Cat = apps.get_model('cats', 'Cat')
+    Rating = apps.get_model('cats', 'Rating')
+    ratings = Rating.objects.filter(cat=OuterRef('pk')).order_by().values('cat')
+    Cat.objects.update(
+        rating_count=Coalesce(Subquery(ratings.annotate(count=Count('id')).values('count')), 0),
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('value')).values('total')), 0.0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0016_remove_cat_avg_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cat',
+            name='rating_sum',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
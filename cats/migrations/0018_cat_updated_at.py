@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0017_cat_rating_count_cat_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
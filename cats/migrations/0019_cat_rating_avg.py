@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:05
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0018_cat_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='rating_avg',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(rating_count=0, then=models.Value(0.0)), default=django.db.models.expressions.CombinedExpression(models.F('rating_sum'), '/', models.F('rating_count'))), output_field=models.FloatField()),
+        ),
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['-rating_avg', 'id'], name='cat_top_rated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['breed', '-rating_avg', 'id'], name='cat_breed_top_rated_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:09
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_name_trigram_index(apps, schema_editor):
+    # Serves name LIKE '%...%' and trigram similarity searches, PostgreSQL only.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS cat_name_trgm_idx ON cats_cat USING gin (name gin_trgm_ops)'
+    )
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS cat_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0019_cat_rating_avg'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['breed', 'id'], name='cat_breed_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='cat_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['cat', 'value'], name='rating_cat_value_idx'),
+        ),
+        migrations.RunPython(create_name_trigram_index, drop_name_trigram_index),
+    ]
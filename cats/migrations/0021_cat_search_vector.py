@@ -0,0 +1,46 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:10
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def fill_search_vector(apps, schema_editor):
+    # GIN indexes and tsvector exist on PostgreSQL only, elsewhere the column stays empty.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Breed = apps.get_model('cats', 'Breed')
+    Cat = apps.get_model('cats', 'Cat')
+    breed_name = Breed.objects.filter(pk=OuterRef('breed_id')).values('name')
+    Cat.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='english')
+        + SearchVector(Subquery(breed_name), weight='B', config='english')
+        + SearchVector('color', weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+    ))
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS cat_search_idx ON cats_cat USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS cat_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0020_cat_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search_vector, drop_search_index),
+    ]
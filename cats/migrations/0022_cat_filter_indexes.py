@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:13
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0021_cat_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['age', 'id'], name='cat_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(django.db.models.functions.text.Upper('color'), name='cat_color_upper_idx'),
+        ),
+    ]
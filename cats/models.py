@@ -1,12 +1,73 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Upper
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.utils import timezone
 from django.db.models.fields.generated import GeneratedField
 
 # Create your models here.
-class CatManager(models.Manager):
+class CatQuerySet(models.QuerySet):
+
+    def with_listing_data(self):
+        # Everything CatSerializer reads: breed and owner in the same query,
+        # the average rating comes from the stored aggregate columns.
+        return self.select_related('breed', 'owner').defer('search_vector')
+
+    def top_rated(self):
+        # Walks cat_top_rated_idx (or cat_breed_top_rated_idx after a breed filter),
+        # so the top k cats cost k index entries.
+        return self.filter(rating_avg__gt=0).order_by('-rating_avg', 'id')
+
+    def search(self, query):
+        if connections[self.db].vendor != 'postgresql':
+            # No full-text search elsewhere, a plain substring match keeps the endpoint usable.
+            return self.filter(
+                Q(name__icontains=query) | Q(description__icontains=query)
+                | Q(color__icontains=query) | Q(breed__name__icontains=query)
+            ).order_by('id')
+        # Both conditions are answered by GIN indexes (cat_search_idx and cat_name_trgm_idx),
+        # only the matching rows get ranked. The trigram match forgives typos in the name.
+        search_query = SearchQuery(query, search_type='websearch', config=Cat.SEARCH_CONFIG)
+        return self.filter(
+            Q(search_vector=search_query) | Q(name__trigram_similar=query)
+        ).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            similarity=TrigramSimilarity('name', query),
+        ).order_by('-rank', '-similarity', 'id')
+
+    def refresh_search_vector(self):
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        breed_name = Breed.objects.filter(pk=OuterRef('breed_id')).values('name')
+        return self.update(search_vector=(
+            SearchVector('name', weight='A', config=Cat.SEARCH_CONFIG)
+            + SearchVector(Subquery(breed_name), weight='B', config=Cat.SEARCH_CONFIG)
+            + SearchVector('color', weight='B', config=Cat.SEARCH_CONFIG)
+            + SearchVector('description', weight='C', config=Cat.SEARCH_CONFIG)
+        ))
+
+    def rebuild_rating_aggregates(self):
+        # Both subqueries are answered from rating_cat_value_idx alone.
+        ratings = Rating.objects.filter(cat=OuterRef('pk')).order_by().values('cat')
+        return self.update(
+            rating_count=Coalesce(Subquery(ratings.annotate(count=Count('value')).values('count')), 0),
+            rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('value')).values('total')), 0.0),
+            updated_at=timezone.now(),
+        )
+
+
+class CatManager(models.Manager.from_queryset(CatQuerySet)):
     
     def create_cat(self, name, age, color, breed, owner, description=''):
-        breed_name, created = Breed.objects.get_or_create(name=breed)
+        from .breeds import breed_resolver
+        breed_name = breed_resolver.resolve(breed)
         cat = Cat(
             name=name,
             age=age,
@@ -18,6 +79,93 @@ class CatManager(models.Manager):
         cat.save()
         return cat
 
+    def bulk_create_cats(self, cats):
+        from .breeds import breed_resolver
+        from .cache import invalidate_cats
+        with transaction.atomic():
+            # Unknown breeds are resolved with one query and the missing ones created in one INSERT.
+            breeds = breed_resolver.resolve_many([cat['breed'] for cat in cats])
+            objs = []
+            for data in cats:
+                cat = Cat(
+                    name=data['name'],
+                    age=data['age'],
+                    color=data['color'],
+                    breed=breeds[data['breed']],
+                    owner=data['owner'],
+                    description=data.get('description', '')
+                )
+                cat.set_default_name()
+                objs.append(cat)
+            cats = self.bulk_create(objs)
+            self.filter(pk__in=[cat.pk for cat in cats]).refresh_search_vector()
+            # bulk_create sends no post_save, so the cached cat lists are invalidated here.
+            invalidate_cats()
+            return cats
+
+    def apply_rating_delta(self, cat_id, count=0, total=0.0):
+        # Shift the stored aggregates in place so concurrent ratings don't overwrite each other.
+        return self.filter(pk=cat_id).update(
+            rating_count=F('rating_count') + count,
+            rating_sum=F('rating_sum') + total,
+            updated_at=timezone.now(),
+        )
+
+    def apply_rating_deltas(self, deltas):
+        # The same in one UPDATE for a {cat_id: (count, total)} mapping.
+        if not deltas:
+            return 0
+        count = Case(
+            *(When(pk=cat_id, then=Value(count)) for cat_id, (count, total) in deltas.items()),
+            default=Value(0), output_field=models.IntegerField(),
+        )
+        total = Case(
+            *(When(pk=cat_id, then=Value(float(total))) for cat_id, (count, total) in deltas.items()),
+            default=Value(0.0), output_field=models.FloatField(),
+        )
+        return self.filter(pk__in=deltas).update(
+            rating_count=F('rating_count') + count,
+            rating_sum=F('rating_sum') + total,
+            updated_at=timezone.now(),
+        )
+
+
+class RatingManager(models.Manager):
+
+    def bulk_rate(self, user, ratings, update_existing=False):
+        '''Stores a {cat_id: value} mapping of one user's ratings.
+
+        Cats the user has already rated are skipped, or overwritten with update_existing.
+        Returns the IDs of those already rated cats.
+        '''
+        from exhibition.metrics import record_ratings
+        from .cache import invalidate_cats
+        from .events import publish_rating_updates
+        with transaction.atomic():
+            rated = dict(self.filter(user=user, cat_id__in=ratings).values_list('cat_id', 'value'))
+            objs = [
+                Rating(user=user, cat_id=cat_id, value=value)
+                for cat_id, value in ratings.items()
+                if update_existing or cat_id not in rated
+            ]
+            if update_existing:
+                self.bulk_create(objs, update_conflicts=True, unique_fields=['user', 'cat'], update_fields=['value'])
+            else:
+                self.bulk_create(objs, ignore_conflicts=True)
+            # bulk_create skips the signal handlers, shift the aggregates of the touched cats in
+            # one UPDATE instead, by deltas like a single rating so concurrent ones aren't lost.
+            deltas = {
+                obj.cat_id: (0, obj.value - rated[obj.cat_id]) if obj.cat_id in rated else (1, obj.value)
+                for obj in objs
+            }
+            Cat.objects.apply_rating_deltas(deltas)
+            cat_ids = list(deltas)
+            invalidate_cats(cat_ids)
+            publish_rating_updates(cat_ids)
+            created = sum(1 for cat_id in cat_ids if cat_id not in rated)
+            transaction.on_commit(lambda: record_ratings(created))
+        return set(rated)
+
 
 class Breed(models.Model):
     name = models.CharField(max_length=64, unique=True)
@@ -33,24 +181,72 @@ class Cat(models.Model):
     description = models.CharField(max_length=255, default='', blank=True, null=True)
     breed = models.ForeignKey(Breed, on_delete=models.RESTRICT)
     owner = models.ForeignKey(User, related_name='ownership', on_delete=models.CASCADE)
-    # avg_rating = models.ManyToManyField(User, through='Rating')
+    # Maintained by the Rating signal handlers, never written by Cat.save().
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.FloatField(default=0.0, editable=False)
+    # Bumped by every change of the cat or its ratings, drives the conditional GETs.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Computed by the database from the aggregates above, indexed for the leaderboard.
+    rating_avg = GeneratedField(
+        expression=Case(
+            When(rating_count=0, then=Value(0.0)),
+            default=F('rating_sum') / F('rating_count'),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+    # Weighted name, breed, color and description, written by refresh_search_vector().
+    search_vector = SearchVectorField(null=True, editable=False)
     objects = CatManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating_avg', 'id'], name='cat_top_rated_idx'),
+            models.Index(fields=['breed', '-rating_avg', 'id'], name='cat_breed_top_rated_idx'),
+            # The by-breed listing pages through a breed in ID order.
+            models.Index(fields=['breed', 'id'], name='cat_breed_id_idx'),
+            # Case insensitive lookups, Django compares UPPER() on PostgreSQL. Substring
+            # searches use the trigram index created in migration 0020.
+            models.Index(Upper('name'), name='cat_name_upper_idx'),
+            # Filters and sort keys of the cat list.
+            models.Index(fields=['age', 'id'], name='cat_age_idx'),
+            models.Index(Upper('color'), name='cat_color_upper_idx'),
+        ]
+
+    RATING_AGGREGATE_FIELDS = ('rating_count', 'rating_sum')
+    SEARCH_FIELDS = ('name', 'color', 'description', 'breed_id')
+    SEARCH_CONFIG = 'english'
+
     def __str__(self):
         return f'Name: {self.name}, Breed: {self.breed}'
 
-    def save(self, *args, **kwargs):
+    def set_default_name(self):
         # If the name value is an empty string set it to 'unknown'.
         if not self.name or not self.name.strip():
             self.name = 'unknown'
+
+    def save(self, *args, **kwargs):
+        self.set_default_name()
+        # Don't write back rating aggregates that may be stale in this instance.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated
+                and field.attname not in self.RATING_AGGREGATE_FIELDS
+                and field.attname != 'search_vector'
+            ]
         # If the specified breed already exists get that breed.
         super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {
+            self._meta.get_field(name).attname for name in update_fields
+        } & set(self.SEARCH_FIELDS):
+            Cat.objects.filter(pk=self.pk).refresh_search_vector()
 
     @property
     def avg_rating(self):
-        ratings = self.rating_set.all()
-        if ratings:
-            return round(sum(rating.value for rating in ratings) / len(ratings), 1)
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 1)
         return 0.0
     
     
@@ -58,12 +254,34 @@ class Rating(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     cat = models.ForeignKey(Cat, on_delete=models.CASCADE)
     value = models.FloatField()
+    objects = RatingManager()
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['user', 'cat'], name='cat-rating')
         ]
+        indexes = [
+            # Covers the per-cat count and sum, no heap access needed.
+            models.Index(fields=['cat', 'value'], name='rating_cat_value_idx'),
+        ]
     
     def __str__(self):
         return f'{self.user} | {self.cat.name} | {self.value}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so the aggregate handlers can apply the difference.
+        stored = dict(zip(field_names, values))
+        instance._stored = (stored.get('cat_id'), stored.get('value'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The insert and the aggregate update in the post_save handler must commit together.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
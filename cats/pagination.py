@@ -0,0 +1,21 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class IdCursorPagination(CursorPagination):
+    '''Keyset pagination over the primary key, every page costs the same as the first one.'''
+
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class SearchPagination(LimitOffsetPagination):
+    '''Search results are ordered by rank, which has no key to continue from.'''
+
+    def __init__(self):
+        self.default_limit = settings.API_PAGE_SIZE
+        self.max_limit = settings.API_MAX_PAGE_SIZE
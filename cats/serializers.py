@@ -1,10 +1,33 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db.utils import IntegrityError
 from rest_framework import serializers
+from exhibition.middleware import timed_serialization
 from .models import Cat, Breed, Rating
 
 
-class CatSerializer(serializers.ModelSerializer):
+class TimedDataMixin:
+    '''Counts the rendering of .data as serializer time of the current request.'''
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+
+class CatListSerializer(TimedListSerializer):
+
+    def create(self, validated_data):
+        for data in validated_data:
+            data['breed'] = data['breed'].lower()
+        return Cat.objects.bulk_create_cats(validated_data)
+
+
+class CatSerializer(TimedDataMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     breed = serializers.CharField()
     description = serializers.CharField(default='')
@@ -14,6 +37,7 @@ class CatSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cat
         fields = ['id', 'name', 'age', 'color', 'description', 'breed', 'owner', 'average_rating']
+        list_serializer_class = CatListSerializer
 
     def create(self, validated_data):
         return Cat.objects.create_cat(
@@ -29,19 +53,21 @@ class CatSerializer(serializers.ModelSerializer):
         return obj.avg_rating
     
 
-class BreedSerializer(serializers.ModelSerializer):
+class BreedSerializer(TimedDataMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Breed
         fields = ['id', 'name']
+        list_serializer_class = TimedListSerializer
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     ownership = CatSerializer(many=True, read_only=True)
 
     class Meta:
         model = User
         fields = ['id', 'username', 'ownership']
+        list_serializer_class = TimedListSerializer
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -59,6 +85,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
     
 
+def validate_rating_value(value):
+    if value < 1 or value > 10:
+        raise serializers.ValidationError('The rating value must be between 1.0 and 10.0')
+    return value
+
+
 class RatingSerializer(serializers.ModelSerializer):
     value = serializers.FloatField()
     cat = serializers.PrimaryKeyRelatedField(queryset=Cat.objects.all())
@@ -68,9 +100,7 @@ class RatingSerializer(serializers.ModelSerializer):
         fields = ['cat', 'value']
 
     def validate_value(self, value):
-        if value < 1 or value > 10:
-            raise serializers.ValidationError('The rating value must be between 1.0 and 10.0')
-        return value
+        return validate_rating_value(value)
         
     def create(self, validated_date):
         request = self.context.get('request')
@@ -81,7 +111,58 @@ class RatingSerializer(serializers.ModelSerializer):
         except IntegrityError:
             raise serializers.ValidationError("You've already rated this cat.")
         return rating
-    
 
 
-    
+class RatingBatchItemSerializer(serializers.Serializer):
+    # Existence of the cats is checked for the whole batch at once.
+    cat = serializers.IntegerField()
+    value = serializers.FloatField()
+
+    def validate_value(self, value):
+        return validate_rating_value(value)
+
+
+class RatingBatchSerializer(serializers.Serializer):
+    mode = serializers.ChoiceField(choices=['skip', 'update'], default='skip')
+    ratings = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_ratings(self, ratings):
+        if len(ratings) > settings.API_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(f'Ensure this field has no more than {settings.API_BULK_MAX_ITEMS} elements.')
+        return ratings
+
+    def create(self, validated_data):
+        """Rates every valid item and returns the status of each one in request order."""
+        user = self.context['request'].user
+        results = []
+        ratings = {}
+        # Positions of the repeated cats, which are duplicates only if the cat exists.
+        repeated = set()
+        for item in validated_data['ratings']:
+            serializer = RatingBatchItemSerializer(data=item)
+            if not serializer.is_valid():
+                results.append({'cat': item.get('cat'), 'status': 'invalid', 'errors': serializer.errors})
+                continue
+            cat_id, value = serializer.validated_data['cat'], serializer.validated_data['value']
+            if cat_id in ratings:
+                repeated.add(len(results))
+            results.append({'cat': cat_id, 'status': None})
+            ratings.setdefault(cat_id, value)
+
+        existing = set(Cat.objects.filter(pk__in=ratings).values_list('pk', flat=True))
+        for cat_id in ratings.keys() - existing:
+            del ratings[cat_id]
+        rated = Rating.objects.bulk_rate(user, ratings, update_existing=validated_data['mode'] == 'update')
+
+        for position, result in enumerate(results):
+            if result['status'] is not None:
+                continue
+            if result['cat'] not in existing:
+                result.update(status='invalid', errors={'cat': [f'Invalid pk "{result["cat"]}" - object does not exist.']})
+            elif position in repeated:
+                result['status'] = 'duplicate'
+            elif result['cat'] not in rated:
+                result['status'] = 'accepted'
+            else:
+                result['status'] = 'updated' if validated_data['mode'] == 'update' else 'duplicate'
+        return results
@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from exhibition.metrics import record_ratings
+
+from .breeds import breed_resolver
+from .cache import bump_cache_version, invalidate_cats
+from .events import publish_rating_updates
+from .models import Breed, Cat, Rating
+
+
+@receiver(post_save, sender=Rating)
+def update_rating_aggregates(sender, instance, created, **kwargs):
+    stored = getattr(instance, '_stored', None)
+    if created:
+        Cat.objects.apply_rating_delta(instance.cat_id, count=1, total=instance.value)
+        transaction.on_commit(record_ratings)
+    elif stored is not None:
+        old_cat_id, old_value = stored
+        if old_cat_id != instance.cat_id:
+            Cat.objects.apply_rating_delta(old_cat_id, count=-1, total=-old_value)
+            Cat.objects.apply_rating_delta(instance.cat_id, count=1, total=instance.value)
+            invalidate_cats([old_cat_id])
+            publish_rating_updates([old_cat_id])
+        elif old_value != instance.value:
+            Cat.objects.apply_rating_delta(instance.cat_id, total=instance.value - old_value)
+    instance._stored = (instance.cat_id, instance.value)
+    invalidate_cats([instance.cat_id])
+    publish_rating_updates([instance.cat_id])
+
+
+def deleted_in_cascade(origin):
+    # origin is the instance or queryset delete() was called on.
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin is not None and model is not Rating
+
+
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_aggregates(sender, instance, origin=None, **kwargs):
+    # Ratings deleted along with their cat need no update, those of a deleted user are
+    # taken out of the other cats by remove_user_ratings() in one UPDATE.
+    if deleted_in_cascade(origin):
+        return
+    Cat.objects.apply_rating_delta(instance.cat_id, count=-1, total=-instance.value)
+    invalidate_cats([instance.cat_id])
+    publish_rating_updates([instance.cat_id])
+
+
+@receiver(post_save, sender=Breed)
+@receiver(post_delete, sender=Breed)
+def clear_breed_cache(sender, **kwargs):
+    breed_resolver.clear()
+    bump_cache_version('breeds')
+
+
+@receiver(post_save, sender=Breed)
+def touch_breed_cats(sender, instance, created, **kwargs):
+    # The breed name is part of every cat representation.
+    if not created:
+        cats = Cat.objects.filter(breed=instance)
+        cats.update(updated_at=timezone.now())
+        cats.refresh_search_vector()
+        invalidate_cats(cats.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Cat)
+def invalidate_saved_cat(sender, instance, **kwargs):
+    invalidate_cats([instance.pk])
+
+
+@receiver(post_delete, sender=Cat)
+def invalidate_deleted_cat(sender, instance, **kwargs):
+    invalidate_cats([instance.pk])
+
+
+@receiver(pre_delete, sender=User)
+def remove_user_ratings(sender, instance, **kwargs):
+    ratings = Rating.objects.filter(user=instance).exclude(cat__owner=instance).values_list('cat_id', 'value')
+    deltas = {cat_id: (-1, -value) for cat_id, value in ratings}
+    if deltas:
+        Cat.objects.apply_rating_deltas(deltas)
+        invalidate_cats(deltas)
+        publish_rating_updates(deltas)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_list(sender, instance, signal, created=False, update_fields=None, **kwargs):
+    bump_cache_version('users')
+    # The owner's username is part of the representation of their cats. Saves of other
+    # fields alone, like last_login on every login, leave the cats as they are, and the
+    # cats of a deleted user are gone.
+    if signal is post_save and not created and (update_fields is None or 'username' in update_fields):
+        cats = Cat.objects.filter(owner=instance)
+        cats.update(updated_at=timezone.now())
+        invalidate_cats(cats.values_list('pk', flat=True))
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from cats.models import Breed, Cat
+
+
+class AsyncViewsTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='username', password='password')
+        self.breed = Breed.objects.create(name='scottish fold')
+        self.cat = Cat.objects.create(name='Tom', age=37, color='black', breed=self.breed, owner=self.user)
+
+    async def test_breed_list(self):
+        response = await self.async_client.get('/api/async/breeds/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'id': self.breed.id, 'name': 'scottish fold'}])
+
+    async def test_cat_details(self):
+        response = await self.async_client.get(f'/api/async/cat/details/{self.cat.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['breed'], 'scottish fold')
+        self.assertEqual(response.json()['owner'], 'username')
+
+    async def test_cat_details_not_found(self):
+        response = await self.async_client.get('/api/async/cat/details/99')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(API_PAGE_SIZE=1)
+    async def test_cat_list_pages(self):
+        cat = await Cat.objects.acreate(name='Sam', age=12, color='grey', breed=self.breed, owner=self.user)
+        response = await self.async_client.get('/api/async/cats/')
+        data = response.json()
+        self.assertEqual([item['name'] for item in data['results']], ['Tom'])
+        # Follow the next link to the second and last page.
+        response = await self.async_client.get(data['next'])
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['results']], [cat.id])
+        self.assertIsNone(data['next'])
+
+    async def test_empty_cat_list(self):
+        await Cat.objects.all().adelete()
+        response = await self.async_client.get('/api/async/cats/')
+        self.assertEqual(response.json(), {'msg': 'There are no cats yet.'})
+
+    async def test_cat_list_by_breed(self):
+        response = await self.async_client.get(f'/api/async/cats/breed/{self.breed.id}')
+        self.assertEqual(len(response.json()['results']), 1)
+        response = await self.async_client.get('/api/async/cats/breed/99')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,59 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from cats.models import Breed, Cat, Rating
+
+
+class ExportDataCommandTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='username')
+        self.breed = Breed.objects.create(name='siamese')
+        self.cat = Cat.objects.create(name='Tom', age=37, color='black', breed=self.breed, owner=self.user)
+        self.rating = Rating.objects.create(user=self.user, cat=self.cat, value=9)
+
+    def _export(self, *args):
+        stdout = StringIO()
+        call_command('export_data', *args, stdout=stdout)
+        return stdout.getvalue().splitlines()
+
+    def test_export_ratings_ndjson(self):
+        lines = self._export('ratings')
+        self.assertEqual(
+            json.loads(lines[0]),
+            {'id': self.rating.id, 'user_id': self.user.id, 'cat_id': self.cat.id, 'value': 9.0}
+        )
+
+    def test_export_cats_csv(self):
+        lines = self._export('cats', '--format', 'csv')
+        self.assertEqual(lines[0], 'id,name,age,color,description,breed_id,owner_id,rating_count,rating_sum')
+        self.assertEqual(len(lines), 2)
+
+    def test_export_since_id(self):
+        # Nothing is newer than the last cat.
+        self.assertEqual(self._export('cats', '--since-id', str(self.cat.id)), [])
+
+
+class SeedDataCommandTest(TestCase):
+
+    def _seed(self, *args):
+        call_command('seed_data', '--users', 5, '--breeds', 2, '--cats', 10, '--ratings', 3, *args, stdout=StringIO())
+        return list(Cat.objects.order_by('id').values_list('name', 'age', 'color', 'breed__name', 'rating_sum'))
+
+    def test_seed_data(self):
+        self._seed()
+        self.assertEqual(User.objects.filter(username__startswith='bench_').count(), 5)
+        self.assertEqual(Breed.objects.count(), 2)
+        self.assertEqual(Rating.objects.count(), 30)
+        # The aggregates of the bulk created ratings are rebuilt.
+        self.assertTrue(all(cat.rating_count == 3 for cat in Cat.objects.all()))
+        self.assertTrue(User.objects.get(username='bench_0').check_password('benchmark'))
+
+    def test_same_seed_same_data(self):
+        first = self._seed('--seed', 7)
+        self.assertEqual(self._seed('--seed', 7, '--clear'), first)
+        self.assertNotEqual(self._seed('--seed', 8, '--clear'), first)
@@ -0,0 +1,72 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from cats.async_views import rating_event_stream
+from cats.events import broker
+from cats.models import Breed, Cat, Rating
+
+
+class RatingEventsTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='username', password='password')
+        breed = Breed.objects.create(name='scottish fold')
+        self.cat = Cat.objects.create(name='Tom', age=37, color='black', breed=breed, owner=self.user)
+
+    def rate(self, value):
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(user=self.user, cat=self.cat, value=value)
+
+    async def test_rating_is_published(self):
+        subscription = broker.subscribe()
+        try:
+            await sync_to_async(self.rate)(4.0)
+            event = await subscription.get(timeout=1)
+        finally:
+            subscription.close()
+        self.assertEqual(event, {'cat_id': self.cat.id, 'average_rating': 4.0, 'rating_count': 1})
+
+    async def test_bulk_rate_is_published(self):
+        subscription = broker.subscribe()
+        try:
+            def bulk_rate():
+                with self.captureOnCommitCallbacks(execute=True):
+                    Rating.objects.bulk_rate(self.user, {self.cat.id: 3.0})
+            await sync_to_async(bulk_rate)()
+            event = await subscription.get(timeout=1)
+        finally:
+            subscription.close()
+        self.assertEqual(event['rating_count'], 1)
+
+    async def test_closed_subscription_gets_nothing(self):
+        subscription = broker.subscribe()
+        subscription.close()
+        await sync_to_async(self.rate)(4.0)
+        self.assertIsNone(await subscription.get(timeout=0.1))
+
+    async def test_stream_format(self):
+        subscription = broker.subscribe()
+        stream = rating_event_stream(subscription, keepalive=0.1)
+        self.assertEqual(await anext(stream), 'retry: 3000\n\n')
+        # Nothing happened within the keepalive interval.
+        self.assertEqual(await anext(stream), ': keepalive\n\n')
+        await sync_to_async(self.rate)(5.0)
+        self.assertEqual(
+            await anext(stream),
+            f'event: rating\ndata: {{"cat_id": {self.cat.id}, "average_rating": 5.0, "rating_count": 1}}\n\n'
+        )
+        await stream.aclose()
+        self.assertNotIn(subscription, broker._subscriptions)
+
+    async def test_stream_headers(self):
+        response = await self.async_client.get('/api/cats/ratings/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        await response.streaming_content.aclose()
+
+    def test_stream_not_served_under_wsgi(self):
+        subscriptions = len(broker._subscriptions)
+        response = self.client.get('/api/cats/ratings/stream/')
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(len(broker._subscriptions), subscriptions)
@@ -0,0 +1,92 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from cats.models import Breed, Cat, Rating
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans are checked on PostgreSQL only.')
+class QueryPlanTest(TestCase):
+    '''The main queries of the endpoints must be served by an index.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        breeds = Breed.objects.bulk_create(Breed(name=f'breed {i}') for i in range(5))
+        judges = [User.objects.create_user(username=f'judge{i}') for i in range(3)]
+        cats = Cat.objects.bulk_create(
+            Cat(name=f'Tom {i}', age=i % 200, color='grey', breed=breeds[i % 5], owner=judges[i % 3])
+            for i in range(200)
+        )
+        Rating.objects.bulk_create(
+            Rating(user=judge, cat=cat, value=(cat.id + judge.id) % 10 + 1)
+            for cat in cats for judge in judges
+        )
+        Cat.objects.rebuild_rating_aggregates()
+        cls.breed = breeds[0]
+        cls.cat = cats[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        with connection.cursor() as cursor:
+            # A tiny table is cheaper to scan, so make the planner use any usable index.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('ANALYZE')
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def assertNoSeqScan(self, sql):
+        plan = self.explain(sql)
+        self.assertNotIn('Seq Scan', plan, f'{sql}\n{plan}')
+
+    def assertEndpointUsesIndexes(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        selects = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNoSeqScan(sql)
+
+    def test_cat_list(self):
+        self.assertEndpointUsesIndexes('/api/cats/')
+
+    def test_cat_list_by_breed(self):
+        self.assertEndpointUsesIndexes(f'/api/cats/breed/{self.breed.id}')
+
+    def test_top_cats(self):
+        self.assertEndpointUsesIndexes('/api/cats/top/')
+
+    def test_top_cats_by_breed(self):
+        self.assertEndpointUsesIndexes(f'/api/cats/top/?breed={self.breed.id}')
+
+    def test_cat_details(self):
+        self.assertEndpointUsesIndexes(f'/api/cat/details/{self.cat.id}')
+
+    def test_user_list(self):
+        self.assertEndpointUsesIndexes('/api/users/')
+
+    def captured_sql(self, queryset):
+        with CaptureQueriesContext(connection) as context:
+            list(queryset)
+        return context.captured_queries[0]['sql']
+
+    def test_rating_aggregates(self):
+        sql = self.captured_sql(
+            Rating.objects.filter(cat=self.cat).values('cat').annotate(count=Count('value'), total=Sum('value'))
+        )
+        self.assertNoSeqScan(sql)
+        self.assertIn('rating_cat_value_idx', self.explain(sql))
+
+    def test_name_lookups(self):
+        self.assertNoSeqScan(self.captured_sql(Cat.objects.filter(name__iexact='tom 1')))
+        self.assertNoSeqScan(self.captured_sql(Cat.objects.filter(name__trigram_similar='tom')))
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from cats.models import Breed, Cat, Rating
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.user = User.objects.create_user(username='username', password='password')
+        breed = Breed.objects.create(name='scottish fold')
+        self.cat = Cat.objects.create(name='Tom', age=37, color='black', breed=breed, owner=self.user)
+
+    def test_endpoint(self):
+        self.client.get('/api/cats/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'exhibition_http_requests_total{method="GET",status="200",view="cat-list"}', response.content)
+
+    def test_endpoint_is_not_public(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='scraper')
+    def test_endpoint_with_token(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer sch\xe9ma')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer scraper')
+        self.assertEqual(response.status_code, 200)
+
+    def test_request_metrics(self):
+        requests = sample('exhibition_http_requests_total', view='cat-details', method='GET', status='200')
+        queries = sample('exhibition_db_queries_per_request_sum', view='cat-details')
+        self.client.get(f'/api/cat/details/{self.cat.id}')
+        self.assertEqual(
+            sample('exhibition_http_requests_total', view='cat-details', method='GET', status='200'),
+            requests + 1
+        )
+        self.assertGreater(sample('exhibition_db_queries_per_request_sum', view='cat-details'), queries)
+
+    def test_jwt_authentication_time(self):
+        count = sample('exhibition_jwt_authentication_seconds_count')
+        token = self.client.post('/api/token/', {'username': 'username', 'password': 'password'}).json()['access']
+        self.client.get('/api/cats/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(sample('exhibition_jwt_authentication_seconds_count'), count + 1)
+
+    def test_rating_counter(self):
+        ratings = sample('exhibition_ratings_created_total')
+        judge = User.objects.create_user(username='judge')
+        other = Cat.objects.create(name='Sam', age=12, color='grey', breed=self.cat.breed, owner=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(user=self.user, cat=self.cat, value=8)
+        with self.captureOnCommitCallbacks(execute=True):
+            # The cat already rated by the user is skipped.
+            Rating.objects.bulk_rate(self.user, {self.cat.id: 9, other.id: 7})
+            Rating.objects.bulk_rate(judge, {self.cat.id: 9})
+        self.assertEqual(sample('exhibition_ratings_created_total'), ratings + 3)
+
+    def test_response_cache_lookups(self):
+        misses = sample('exhibition_cache_requests_total', cache='response', result='miss')
+        hits = sample('exhibition_cache_requests_total', cache='response', result='hit')
+        self.client.get('/api/breeds/')
+        self.client.get('/api/breeds/')
+        self.assertEqual(sample('exhibition_cache_requests_total', cache='response', result='miss'), misses + 1)
+        self.assertEqual(sample('exhibition_cache_requests_total', cache='response', result='hit'), hits + 1)
@@ -0,0 +1,54 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from cats.models import Breed, Cat
+
+
+class PerformanceMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user(username='username', password='password')
+        breed = Breed.objects.create(name='scottish fold')
+        self.cat = Cat.objects.create(name='Tom', age=37, color='black', breed=breed, owner=user)
+
+    def test_server_timing(self):
+        response = self.client.get('/api/cats/')
+        timings = dict(
+            metric.split(';', 1) for metric in response['Server-Timing'].split(', ')
+        )
+        self.assertEqual(set(timings), {'total', 'db', 'serializer'})
+        # The version query and the page query.
+        self.assertIn('desc="2 queries"', timings['db'])
+
+    def test_log_line(self):
+        with self.assertLogs('exhibition.performance', level='INFO') as logs:
+            self.client.get(f'/api/cat/details/{self.cat.id}')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], f'/api/cat/details/{self.cat.id}')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertNotIn('sql', record)
+
+    @override_settings(PERF_MAX_QUERIES=0)
+    def test_too_many_queries_dump_sql(self):
+        with self.assertLogs('exhibition.performance', level='WARNING') as logs:
+            self.client.get('/api/cats/')
+        record = logs.records[0].performance
+        self.assertTrue(record['too_many_queries'])
+        self.assertFalse(record['slow'])
+        self.assertEqual(len(record['sql']), record['queries'])
+        self.assertIn('cats_cat', record['sql'][-1]['sql'])
+
+    @override_settings(PERF_SLOW_REQUEST_MS=-1)
+    def test_slow_request_dumps_sql(self):
+        with self.assertLogs('exhibition.performance', level='WARNING') as logs:
+            self.client.get('/api/breeds/')
+        self.assertTrue(logs.records[0].performance['slow'])
+
+    async def test_async_view_queries(self):
+        response = await self.async_client.get(f'/api/async/cat/details/{self.cat.id}')
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
@@ -1,6 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
-from cats.models import Cat, Breed
+from cats.breeds import BreedResolver, breed_resolver
+from cats.models import Cat, Breed, Rating
 
 from django.db.utils import IntegrityError
 
@@ -18,5 +22,124 @@ class CatModelTest(TestCase):
 
     def test_cat_breed_relationship(self):
         self.assertEqual(self.cat.breed.name, 'scottish fold')
- 
-            
\ No newline at end of file
+
+
+class RatingAggregateTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Bob')
+        self.judge = User.objects.create_user(username='Alice')
+        self.breed = Breed.objects.create(name='scottish fold')
+        self.cat = Cat.objects.create(name='Cathy', age=37, color='black', owner=self.user, breed=self.breed)
+
+    def test_new_cat_has_no_rating(self):
+        self.assertEqual(self.cat.rating_count, 0)
+        self.assertEqual(self.cat.avg_rating, 0.0)
+
+    def test_rating_insert_updates_aggregates(self):
+        Rating.objects.create(user=self.user, cat=self.cat, value=7)
+        Rating.objects.create(user=self.judge, cat=self.cat, value=8)
+        self.cat.refresh_from_db()
+        self.assertEqual(self.cat.rating_count, 2)
+        self.assertEqual(self.cat.rating_sum, 15)
+        self.assertEqual(self.cat.avg_rating, 7.5)
+
+    def test_rating_update_and_delete_update_aggregates(self):
+        Rating.objects.create(user=self.user, cat=self.cat, value=7)
+        rating = Rating.objects.get(user=self.user, cat=self.cat)
+        rating.value = 9
+        rating.save()
+        self.cat.refresh_from_db()
+        self.assertEqual((self.cat.rating_count, self.cat.rating_sum), (1, 9))
+        rating.delete()
+        self.cat.refresh_from_db()
+        self.assertEqual((self.cat.rating_count, self.cat.rating_sum), (0, 0))
+
+    def test_user_delete_cascade_updates_aggregates(self):
+        other = Cat.objects.create(name='Tom', age=12, color='grey', owner=self.user, breed=self.breed)
+        judged = Cat.objects.create(name='Sam', age=12, color='grey', owner=self.judge, breed=self.breed)
+        Rating.objects.create(user=self.judge, cat=self.cat, value=7)
+        Rating.objects.create(user=self.judge, cat=other, value=4)
+        Rating.objects.create(user=self.user, cat=other, value=9)
+        Rating.objects.create(user=self.user, cat=judged, value=2)
+        self.judge.delete()
+        self.cat.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.cat.rating_count, self.cat.rating_sum), (0, 0))
+        self.assertEqual((other.rating_count, other.rating_sum), (1, 9))
+
+    def test_cat_delete_skips_aggregate_updates(self):
+        Rating.objects.create(user=self.user, cat=self.cat, value=7)
+        Rating.objects.create(user=self.judge, cat=self.cat, value=8)
+        # Collecting the ratings and two DELETEs, no UPDATE of the cat per rating.
+        with self.assertNumQueries(3):
+            self.cat.delete()
+
+    def test_bulk_rate_updates_aggregates(self):
+        other = Cat.objects.create(name='Tom', age=12, color='grey', owner=self.user, breed=self.breed)
+        Rating.objects.create(user=self.judge, cat=self.cat, value=4)
+        Rating.objects.bulk_rate(self.user, {self.cat.id: 6})
+        Rating.objects.bulk_rate(self.user, {self.cat.id: 9, other.id: 3}, update_existing=True)
+        self.cat.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.cat.rating_count, self.cat.rating_sum), (2, 13))
+        self.assertEqual((other.rating_count, other.rating_sum), (1, 3))
+
+    def test_cat_save_keeps_aggregates(self):
+        # An instance loaded before the rating must not overwrite the aggregates.
+        stale = Cat.objects.get(pk=self.cat.pk)
+        Rating.objects.create(user=self.user, cat=self.cat, value=6)
+        stale.name = 'Kate'
+        stale.save()
+        self.cat.refresh_from_db()
+        self.assertEqual(self.cat.name, 'Kate')
+        self.assertEqual(self.cat.rating_count, 1)
+
+    def test_rebuild_rating_aggregates_command(self):
+        Rating.objects.create(user=self.user, cat=self.cat, value=4)
+        Rating.objects.create(user=self.judge, cat=self.cat, value=5)
+        Cat.objects.update(rating_count=0, rating_sum=0)
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        self.cat.refresh_from_db()
+        self.assertEqual((self.cat.rating_count, self.cat.rating_sum), (2, 9))
+
+
+class BreedResolverTest(TestCase):
+
+    def setUp(self):
+        self.resolver = BreedResolver(maxsize=2)
+        self.breed = Breed.objects.create(name='scottish fold')
+
+    def test_resolve_caches_breed_id(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resolver.resolve('scottish fold')
+        # The second lookup is served from the cache.
+        with self.assertNumQueries(0):
+            breed = self.resolver.resolve('scottish fold')
+        self.assertEqual(breed.id, self.breed.id)
+        self.assertEqual((self.resolver.hits, self.resolver.misses), (1, 1))
+
+    def test_resolve_creates_missing_breed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            breed = self.resolver.resolve('siamese')
+        self.assertTrue(Breed.objects.filter(pk=breed.pk, name='siamese').exists())
+        self.assertEqual(self.resolver.cache_info()['size'], 1)
+
+    def test_uncommitted_breed_is_not_cached(self):
+        self.resolver.resolve('siamese')
+        self.assertEqual(self.resolver.cache_info()['size'], 0)
+
+    def test_least_recently_used_breed_is_evicted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            breeds = self.resolver.resolve_many(['scottish fold', 'siamese'])
+            self.resolver.resolve('scottish fold')
+            self.resolver.resolve('persian')
+        self.assertEqual(len(breeds), 2)
+        self.assertEqual(list(self.resolver._ids), ['scottish fold', 'persian'])
+
+    def test_breed_change_clears_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            breed_resolver.resolve('scottish fold')
+        self.breed.name = 'fold'
+        self.breed.save()
+        self.assertEqual(breed_resolver.cache_info()['size'], 0)
@@ -0,0 +1,152 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from cats.models import Breed, Cat, Rating
+from cats.tests.utils import QueryBudgetMixin, seed_owners
+
+
+class ConstantQueryCountTest(QueryBudgetMixin, TestCase):
+    '''
+    Every endpoint must issue the same number of queries however much data there is. The
+    budgets are the PostgreSQL counts, Cat.save() also refreshes the search vector there.
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.breed = Breed.objects.create(name='scottish fold')
+        self.judge = User.objects.create_user(username='judge')
+        self.owner = User.objects.create_user(username='owner', password='password')
+        self.cat = Cat.objects.create(name='Tom', age=12, color='grey', breed=self.breed, owner=self.owner)
+        self.seeded = []
+
+    def seed(self, size):
+        self.seeded.extend(seed_owners(size, self.breed, self.judge))
+
+    def new_cat_of_owner(self):
+        return Cat.objects.create(name='Kate', age=12, color='grey', breed=self.breed, owner=self.owner)
+
+    def rated_by_seeded_owners(self, cat):
+        # One rating per seeded owner, so the ratings grow with the dataset.
+        for owner in {seeded.owner_id for seeded in self.seeded}:
+            Rating.objects.create(user_id=owner, cat=cat, value=6)
+        return cat
+
+    def assertConstantQueries(self, url, budget):
+        self.assertScalableQueries(self.seed, lambda size: self.client.get(url), budget)
+
+    def test_user_register(self):
+        self.assertScalableQueries(
+            self.seed,
+            lambda size: self.client.post('/api/user/register/', {'username': f'new{size}', 'password': 'password'}),
+            budget=2
+        )
+
+    def test_user_list(self):
+        self.assertConstantQueries('/api/users/', budget=2)
+
+    def test_breed_list(self):
+        self.assertConstantQueries('/api/breeds/', budget=1)
+
+    def test_cat_list(self):
+        self.assertConstantQueries('/api/cats/', budget=2)
+
+    def test_cat_list_filtered(self):
+        self.assertConstantQueries('/api/cats/?breed=scottish fold&rating_min=5&ordering=-rating', budget=2)
+
+    def test_cat_list_stream(self):
+        self.assertConstantQueries('/api/cats/?stream=1', budget=2)
+
+    def test_cat_list_by_breed(self):
+        self.assertConstantQueries(f'/api/cats/breed/{self.breed.id}', budget=3)
+
+    def test_top_cats(self):
+        self.assertConstantQueries('/api/cats/top/', budget=1)
+
+    def test_cat_search(self):
+        self.assertConstantQueries('/api/cats/search/?q=tom', budget=2)
+
+    def test_cat_details(self):
+        self.assertConstantQueries(f'/api/cat/details/{self.cat.id}', budget=2)
+
+    def test_cat_update(self):
+        self.client.force_authenticate(self.owner)
+        self.assertScalableQueries(
+            self.seed,
+            lambda size: self.client.put(
+                f'/api/cat/details/{self.cat.id}',
+                {'name': 'Tom', 'age': size, 'color': 'grey', 'breed': 'scottish fold'}
+            ),
+            budget=4
+        )
+
+    def test_cat_delete(self):
+        def seed(size):
+            self.seed(size)
+            self.deleted = self.rated_by_seeded_owners(self.new_cat_of_owner())
+
+        self.client.force_authenticate(self.owner)
+        self.assertScalableQueries(
+            seed, lambda size: self.client.delete(f'/api/cat/details/{self.deleted.id}'), budget=4
+        )
+
+    def test_user_delete(self):
+        # The user owns rated cats and rated the cats of others, both grow with the dataset.
+        # The collector deletes in chunks of 100 rows, the data stays below that.
+        def seed(size):
+            self.seed(size)
+            self.deleted = User.objects.create_user(username=f'leaving{size}')
+            for cat in self.seeded[-size:]:
+                Rating.objects.create(user=self.deleted, cat=cat, value=3)
+                owned = Cat.objects.create(name='Sam', age=12, color='grey', breed=self.breed, owner=self.deleted)
+                Rating.objects.create(user=self.judge, cat=owned, value=6)
+
+        def delete_user(size):
+            self.deleted.delete()
+
+        self.assertScalableQueries(seed, delete_user, budget=11)
+
+    def test_add_cat(self):
+        self.client.force_authenticate(self.owner)
+        self.assertScalableQueries(
+            self.seed,
+            lambda size: self.client.post('/api/cat/add/', {'name': 'Sam', 'age': 12, 'color': 'grey', 'breed': 'scottish fold'}),
+            budget=3
+        )
+
+    def test_add_cats(self):
+        # The number of cats in the request grows with the dataset.
+        self.client.force_authenticate(self.owner)
+        self.assertScalableQueries(
+            self.seed,
+            lambda size: self.client.post(
+                '/api/cat/add/bulk/',
+                [{'name': 'Sam', 'age': 12, 'color': 'grey', 'breed': f'breed {i}'} for i in range(size)],
+                format='json'
+            ),
+            budget=7
+        )
+
+    def test_rate(self):
+        self.client.force_authenticate(self.owner)
+        self.assertScalableQueries(
+            self.seed,
+            lambda size: self.client.post('/api/cat/rate/', {'cat': self.seeded[-1].id, 'value': 7}),
+            budget=5
+        )
+
+    def test_rate_batch(self):
+        self.client.force_authenticate(self.owner)
+        self.assertScalableQueries(
+            self.seed,
+            lambda size: self.client.post(
+                '/api/cat/rate/batch/',
+                {'ratings': [{'cat': cat.id, 'value': 7} for cat in self.seeded[-size:]]},
+                format='json'
+            ),
+            budget=6
+        )
+
+    def test_export_table(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin'))
+        self.assertConstantQueries('/api/export/cats/', budget=1)
@@ -0,0 +1,52 @@
+import datetime
+import decimal
+import uuid
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from exhibition.renderers import FastJSONParser, FastJSONRenderer
+
+
+class FastJSONRendererTest(SimpleTestCase):
+
+    data = {
+        'name': 'Кот Том\u2028\u2029',
+        'rating': 8.5,
+        'price': decimal.Decimal('10.50'),
+        'born': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2024, 5, 1),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'message': gettext_lazy('Not found.'),
+        'tags': ('black', None, True),
+        1: 'integer key',
+    }
+
+    def test_same_output_as_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indent_falls_back(self):
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_none(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class FastJSONParserTest(SimpleTestCase):
+
+    def test_same_result_as_json_parser(self):
+        body = '{"name": "Кот", "values": [1, 2.5, null, true]}'.encode()
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+
+    def test_invalid_json(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"name": '))
+
+    def test_nan_is_rejected(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"value": NaN}'))
@@ -1,9 +1,17 @@
+import json
 import unittest
-from django.test import Client, TestCase
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 
-from cats.models import Breed, Cat
+from cats.cache import get_cache_stats
+from cats.models import Breed, Cat, Rating
 
 
 class BaseConfig(TestCase):
@@ -45,7 +53,7 @@ class UserListTest(BaseConfig):
         # Check that the response code is 200.
         self.assertEqual(response.status_code, 200)
         # Check that there is one user created.
-        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(response.json()['results']), 1)
 
 
 class BreedListTest(BaseConfig):
@@ -59,6 +67,77 @@ class BreedListTest(BaseConfig):
         self.assertEqual(len(response.json()), 1)
 
 
+class BreedListCacheTest(BaseConfig):
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_breed_list_is_cached(self):
+        response = self.client.get('/api/breeds/')
+        self.assertEqual(response.status_code, 200)
+        # The repeated request is answered from the cache.
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/breeds/')
+        self.assertEqual(response.json(), [{'id': self.breed.id, 'name': 'scottish fold'}])
+
+    def test_breed_list_etag(self):
+        etag = self.client.get('/api/breeds/')['ETag']
+        response = self.client.get('/api/breeds/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_breed_change_invalidates_breed_list(self):
+        etag = self.client.get('/api/breeds/')['ETag']
+        Breed.objects.create(name='siamese')
+        response = self.client.get('/api/breeds/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class CachedResponseTest(BaseConfig):
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_user_list_is_cached(self):
+        self.client.get('/api/users/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/users/')
+        self.assertEqual(response.json()['results'][0]['ownership'][0]['name'], 'Tom')
+
+    def test_cat_details_is_cached(self):
+        self.client.get(f'/api/cat/details/{self.cat.id}')
+        # Only the version query of the conditional GET is left.
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/cat/details/{self.cat.id}')
+        self.assertEqual(response.json()['name'], 'Tom')
+
+    def test_rating_invalidates_cached_cats(self):
+        for url in ('/api/cats/', f'/api/cat/details/{self.cat.id}', '/api/users/'):
+            self.client.get(url)
+        Rating.objects.create(user=self.user, cat=self.cat, value=9)
+        self.assertEqual(self.client.get('/api/cats/').json()['results'][0]['average_rating'], 9)
+        self.assertEqual(self.client.get(f'/api/cat/details/{self.cat.id}').json()['average_rating'], 9)
+        self.assertEqual(self.client.get('/api/users/').json()['results'][0]['ownership'][0]['average_rating'], 9)
+
+    def test_breed_rename_invalidates_cached_cats(self):
+        self.client.get(f'/api/cat/details/{self.cat.id}')
+        self.breed.name = 'fold'
+        self.breed.save()
+        self.assertEqual(self.client.get(f'/api/cat/details/{self.cat.id}').json()['breed'], 'fold')
+
+    def test_cache_hit_ratio(self):
+        self.client.get('/api/breeds/')
+        self.client.get('/api/breeds/')
+        self.client.get('/api/breeds/')
+        stats = get_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+        self.assertAlmostEqual(stats['ratio'], 2 / 3)
+
+
 class CatListTest(BaseConfig):
     
     def test_cat_list(self):
@@ -67,7 +146,258 @@ class CatListTest(BaseConfig):
         # Check that the response code is 200.
         self.assertEqual(response.status_code, 200)
         # Check that there is one cat created.
-        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(response.json()['results']), 1)
+
+
+class EmptyCatListTest(TestCase):
+
+    def test_empty_cat_list(self):
+        client = APIClient()
+        # The version query for the conditional GET, then the page query detects the empty exhibition.
+        with self.assertNumQueries(2):
+            response = client.get('/api/cats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'msg': 'There are no cats yet.'})
+
+
+class ConditionalGetTest(BaseConfig):
+
+    def test_cat_details_not_modified(self):
+        response = self.client.get(f'/api/cat/details/{self.cat.id}')
+        self.assertIn('Last-Modified', response)
+        # A matching ETag costs the version query alone.
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/cat/details/{self.cat.id}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_cat_details_if_modified_since(self):
+        last_modified = self.client.get(f'/api/cat/details/{self.cat.id}')['Last-Modified']
+        response = self.client.get(f'/api/cat/details/{self.cat.id}', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_rating_changes_cat_details_etag(self):
+        etag = self.client.get(f'/api/cat/details/{self.cat.id}')['ETag']
+        Rating.objects.create(user=self.user, cat=self.cat, value=7)
+        response = self.client.get(f'/api/cat/details/{self.cat.id}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['average_rating'], 7)
+
+    def test_cat_list_not_modified(self):
+        for url in ('/api/cats/', f'/api/cats/breed/{self.breed.id}'):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_cat_list_etag_depends_on_page(self):
+        first = self.client.get('/api/cats/')['ETag']
+        self.assertNotEqual(self.client.get('/api/cats/', {'page_size': 1})['ETag'], first)
+
+    def test_cat_deletion_changes_cat_list_etag(self):
+        other = Cat.objects.create(name='Sam', age=12, color='grey', breed=self.breed, owner=self.user)
+        etag = self.client.get('/api/cats/')['ETag']
+        other.delete()
+        response = self.client.get('/api/cats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+    def test_cat_moved_to_other_breed_modifies_old_breed_list(self):
+        siamese = Breed.objects.create(name='siamese')
+        Cat.objects.create(name='Sam', age=12, color='grey', breed=self.breed, owner=self.user)
+        Cat.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        cache.clear()
+        last_modified = self.client.get(f'/api/cats/breed/{self.breed.id}')['Last-Modified']
+        self.cat.breed = siamese
+        self.cat.save()
+        response = self.client.get(f'/api/cats/breed/{self.breed.id}', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_owner_rename_changes_cat_details_etag(self):
+        etag = self.client.get(f'/api/cat/details/{self.cat.id}')['ETag']
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(f'/api/cat/details/{self.cat.id}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['owner'], 'renamed')
+
+
+class CatListPaginationTest(BaseConfig):
+
+    def setUp(self):
+        super().setUp()
+        for name in ('Cathy', 'Sam', 'Chuck', 'Kate'):
+            Cat.objects.create(name=name, age=12, color='grey', breed=self.breed, owner=self.user)
+
+    def test_cat_list_page_size(self):
+        # Request the first page with two cats per page.
+        response = self.client.get('/api/cats/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([cat['name'] for cat in data['results']], ['Tom', 'Cathy'])
+        self.assertIsNone(data['previous'])
+        # Follow the cursor to the next page.
+        response = self.client.get(data['next'])
+        self.assertEqual([cat['name'] for cat in response.json()['results']], ['Sam', 'Chuck'])
+
+    @override_settings(API_MAX_PAGE_SIZE=3)
+    def test_cat_list_max_page_size(self):
+        # A larger page size than allowed is capped at the maximum.
+        response = self.client.get('/api/cats/', {'page_size': 100})
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class CatListFilterTest(BaseConfig):
+
+    def setUp(self):
+        super().setUp()
+        self.judge = User.objects.create_user(username='judge')
+        shorthair = Breed.objects.create(name='british shorthair')
+        self.sam = Cat.objects.create(name='Sam', age=12, color='Grey', breed=shorthair, owner=self.judge)
+        self.kate = Cat.objects.create(name='Kate', age=20, color='grey', breed=shorthair, owner=self.user)
+        Cat.objects.create(name='Chuck', age=30, color='grey', breed=shorthair, owner=self.user)
+        for cat, value in ((self.cat, 9), (self.sam, 8.5), (self.kate, 9.5)):
+            Rating.objects.create(user=self.judge, cat=cat, value=value)
+
+    def names(self, params):
+        response = self.client.get('/api/cats/', params)
+        self.assertEqual(response.status_code, 200)
+        return [cat['name'] for cat in response.json()['results']]
+
+    def test_combined_filters_and_ordering(self):
+        params = {'breed': 'British Shorthair', 'age_max': 24, 'color': 'grey', 'rating_min': 8,
+                  'ordering': '-rating'}
+        # The version query and one list query, whatever the filters.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.names(params), ['Kate', 'Sam'])
+
+    def test_breed_and_owner_by_id(self):
+        self.assertEqual(self.names({'breed': self.breed.id}), ['Tom'])
+        self.assertEqual(self.names({'owner': self.judge.id}), ['Sam'])
+        self.assertEqual(self.names({'owner': 'username', 'age_min': 25}), ['Tom', 'Chuck'])
+
+    def test_rating_range(self):
+        self.assertEqual(self.names({'rating_min': 8.6, 'rating_max': 9.2}), ['Tom'])
+
+    def test_invalid_filter(self):
+        response = self.client.get('/api/cats/', {'age_min': 'young'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('age_min', response.json())
+
+    def test_no_match_is_an_empty_page(self):
+        response = self.client.get('/api/cats/', {'color': 'purple'})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_ordering_pages(self):
+        # Equal ages are broken by ID, the cursor continues after the last cat of the page.
+        response = self.client.get('/api/cats/', {'ordering': 'age', 'page_size': 2})
+        self.assertEqual([cat['name'] for cat in response.json()['results']], ['Sam', 'Kate'])
+        response = self.client.get(response.json()['next'])
+        self.assertEqual([cat['name'] for cat in response.json()['results']], ['Chuck', 'Tom'])
+
+    def test_unknown_ordering_is_ignored(self):
+        self.assertEqual(self.names({'ordering': 'password'}), ['Tom', 'Sam', 'Kate', 'Chuck'])
+
+
+class CatListStreamTest(BaseConfig):
+
+    @override_settings(API_PAGE_SIZE=2, API_STREAM_CHUNK_SIZE=2)
+    def test_stream_cat_list(self):
+        for name in ('Cathy', 'Sam', 'Chuck', 'Kate'):
+            Cat.objects.create(name=name, age=12, color='grey', breed=self.breed, owner=self.user)
+        # Stream the whole catalogue regardless of the page size.
+        response = self.client.get('/api/cats/', {'stream': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        with CaptureQueriesContext(connection) as context:
+            data = json.loads(b''.join(response.streaming_content))
+        self.assertIn('ORDER BY', context.captured_queries[-1]['sql'])
+        self.assertEqual([cat['name'] for cat in data], ['Tom', 'Cathy', 'Sam', 'Chuck', 'Kate'])
+        self.assertEqual(data[0]['breed'], 'scottish fold')
+
+    def test_stream_empty_cat_list(self):
+        Cat.objects.all().delete()
+        response = self.client.get('/api/cats/', {'stream': 1})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+
+class TopCatsTest(BaseConfig):
+
+    def setUp(self):
+        super().setUp()
+        self.judge = User.objects.create_user(username='judge')
+        self.siamese = Breed.objects.create(name='siamese')
+        self.sam = Cat.objects.create(name='Sam', age=12, color='grey', breed=self.siamese, owner=self.user)
+        self.kate = Cat.objects.create(name='Kate', age=12, color='grey', breed=self.breed, owner=self.user)
+        Cat.objects.create(name='Chuck', age=12, color='grey', breed=self.breed, owner=self.user)
+        for cat, values in ((self.cat, (6, 8)), (self.sam, (9, 10)), (self.kate, (8, 7))):
+            Rating.objects.create(user=self.user, cat=cat, value=values[0])
+            Rating.objects.create(user=self.judge, cat=cat, value=values[1])
+
+    def test_top_cats(self):
+        response = self.client.get('/api/cats/top/')
+        self.assertEqual(response.status_code, 200)
+        # Chuck has no ratings and is left out.
+        self.assertEqual(
+            [(cat['name'], cat['average_rating']) for cat in response.json()],
+            [('Sam', 9.5), ('Kate', 7.5), ('Tom', 7.0)]
+        )
+
+    def test_top_cats_by_breed_with_limit(self):
+        response = self.client.get('/api/cats/top/', {'breed': self.breed.id, 'limit': 1})
+        self.assertEqual([cat['name'] for cat in response.json()], ['Kate'])
+
+    def test_top_cats_invalid_breed(self):
+        response = self.client.get('/api/cats/top/', {'breed': 'siamese'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'breed': 'A valid integer is required.'})
+
+    def test_top_cats_follow_new_ratings(self):
+        self.client.get('/api/cats/top/')
+        Rating.objects.filter(cat=self.sam).delete()
+        response = self.client.get('/api/cats/top/')
+        self.assertEqual([cat['name'] for cat in response.json()], ['Kate', 'Tom'])
+
+
+class CatSearchTest(BaseConfig):
+
+    def setUp(self):
+        super().setUp()
+        siamese = Breed.objects.create(name='siamese')
+        Cat.objects.create(name='Sam', age=12, color='white', breed=siamese, owner=self.user,
+                           description='Sleeps next to a black dog')
+        Cat.objects.create(name='Kate', age=12, color='grey', breed=siamese, owner=self.user)
+
+    def test_search_by_breed(self):
+        response = self.client.get('/api/cats/search/', {'q': 'siamese'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual({cat['name'] for cat in response.json()['results']}, {'Sam', 'Kate'})
+
+    def test_search_is_paginated(self):
+        response = self.client.get('/api/cats/search/', {'q': 'siamese', 'limit': 1})
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_search_without_query(self):
+        response = self.client.get('/api/cats/search/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_follows_renamed_breed(self):
+        self.assertEqual(self.client.get('/api/cats/search/', {'q': 'oriental'}).json()['count'], 0)
+        breed = Breed.objects.get(name='siamese')
+        breed.name = 'oriental'
+        breed.save()
+        response = self.client.get('/api/cats/search/', {'q': 'oriental'})
+        self.assertEqual(response.json()['count'], 2)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL.')
+    def test_search_ranking_and_typos(self):
+        # The color of Tom outranks the description of Sam.
+        response = self.client.get('/api/cats/search/', {'q': 'black'})
+        self.assertEqual([cat['name'] for cat in response.json()['results']], ['Tom', 'Sam'])
+        # A misspelt name is still found.
+        response = self.client.get('/api/cats/search/', {'q': 'Kathe'})
+        self.assertEqual([cat['name'] for cat in response.json()['results']], ['Kate'])
 
 
 class CatListByBreedTest(BaseConfig):
@@ -78,7 +408,7 @@ class CatListByBreedTest(BaseConfig):
         # Check that the response code is 200.
         self.assertEqual(response.status_code, 200)
         # Check that there is one cat with specified breed.
-        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(response.json()['results']), 1)
 
 
 class AddCatTest(BaseConfig):
@@ -117,6 +447,50 @@ class AddCatTest(BaseConfig):
         self.assertEqual(response.status_code, 201)
 
 
+class AddCatsTest(BaseConfig):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.user)
+        self.payload = [
+            {'name': 'Cathy', 'age': 37, 'color': 'black', 'breed': 'scottish fold'},
+            {'name': 'Sam', 'age': 12, 'color': 'white', 'breed': 'Siamese'},
+            {'name': 'Kate', 'age': 24, 'color': 'grey', 'breed': 'siamese', 'description': 'shy'}
+        ]
+
+    def test_create_cats(self):
+        response = self.client.post('/api/cat/add/bulk/', data=self.payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual([cat['breed'] for cat in data], ['scottish fold', 'siamese', 'siamese'])
+        self.assertEqual(data[2]['description'], 'shy')
+        self.assertEqual(data[0]['owner'], 'username')
+        # The missing breed is created once.
+        self.assertEqual(Breed.objects.filter(name='siamese').count(), 1)
+        self.assertEqual(Cat.objects.count(), 4)
+
+    def test_create_cats_query_count(self):
+        # Breed lookup, breed insert, breed reload and the cat insert inside one transaction.
+        with self.assertNumQueries(6):
+            response = self.client.post('/api/cat/add/bulk/', data=self.payload * 10, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_create_cats_item_errors(self):
+        self.payload[1]['age'] = 0
+        response = self.client.post('/api/cat/add/bulk/', data=self.payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('age', errors[1])
+        # Nothing is created when any item is invalid.
+        self.assertEqual(Cat.objects.count(), 1)
+
+    @override_settings(API_BULK_MAX_ITEMS=2)
+    def test_create_too_many_cats(self):
+        response = self.client.post('/api/cat/add/bulk/', data=self.payload, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
 class CatDetailsTest(BaseConfig):
 
     def setUp(self):
@@ -159,4 +533,93 @@ class CatDetailsTest(BaseConfig):
         response = self.client.delete('/api/cat/details/1')
         self.assertEqual(response.status_code, 204)
 
-        
\ No newline at end of file
+
+class RateBatchTest(BaseConfig):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.user)
+        self.other = Cat.objects.create(name='Sam', age=12, color='grey', breed=self.breed, owner=self.user)
+        Rating.objects.create(user=self.user, cat=self.other, value=5)
+
+    def _rate(self, ratings, mode='skip'):
+        response = self.client.post('/api/cat/rate/batch/', {'mode': mode, 'ratings': ratings}, format='json')
+        self.assertEqual(response.status_code, 202)
+        return [(result['cat'], result['status']) for result in response.json()['results']]
+
+    def test_rate_batch(self):
+        statuses = self._rate([
+            {'cat': self.cat.id, 'value': 8},
+            {'cat': self.other.id, 'value': 9},
+            {'cat': 99, 'value': 9},
+            {'cat': self.cat.id, 'value': 11},
+            {'cat': self.cat.id, 'value': 7},
+            {'cat': 99, 'value': 8},
+        ])
+        self.assertEqual(statuses, [
+            (self.cat.id, 'accepted'), (self.other.id, 'duplicate'), (99, 'invalid'), (self.cat.id, 'invalid'),
+            (self.cat.id, 'duplicate'), (99, 'invalid'),
+        ])
+        self.cat.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.cat.avg_rating, 8)
+        # The existing rating is kept.
+        self.assertEqual((self.other.rating_count, self.other.avg_rating), (1, 5))
+
+    def test_rate_batch_update(self):
+        statuses = self._rate([{'cat': self.cat.id, 'value': 8}, {'cat': self.other.id, 'value': 9}], mode='update')
+        self.assertEqual(statuses, [(self.cat.id, 'accepted'), (self.other.id, 'updated')])
+        self.other.refresh_from_db()
+        self.assertEqual((self.other.rating_count, self.other.avg_rating), (1, 9))
+
+    def test_rate_batch_query_count(self):
+        cats = [
+            Cat.objects.create(name='Kate', age=12, color='grey', breed=self.breed, owner=self.user)
+            for _ in range(10)
+        ]
+        # Cat lookup, rated lookup, insert and aggregate update inside one transaction.
+        with self.assertNumQueries(6):
+            self._rate([{'cat': cat.id, 'value': 7} for cat in cats])
+
+    def test_rate_batch_requires_auth(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post('/api/cat/rate/batch/', {'ratings': []}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class ExportTableTest(BaseConfig):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='admin', password='password')
+        self.client.force_authenticate(user=self.admin)
+
+    def _export(self, table, **params):
+        response = self.client.get(f'/api/export/{table}/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/export/cats/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_ndjson(self):
+        lines = self._export('cats').splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['name'], 'Tom')
+
+    def test_export_csv(self):
+        rows = self._export('breeds', output='csv').splitlines()
+        self.assertEqual(rows, ['id,name', f'{self.breed.id},scottish fold'])
+
+    def test_export_since_id(self):
+        cat = Cat.objects.create(name='Sam', age=12, color='grey', breed=self.breed, owner=self.user)
+        # Only the rows added after the last exported ID are returned.
+        lines = self._export('cats', since_id=self.cat.id).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [cat.id])
+
+    def test_export_invalid_request(self):
+        self.assertEqual(self.client.get('/api/export/users/').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/cats/', {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/export/cats/', {'since_id': 'x'}).status_code, 400)
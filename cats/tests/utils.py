@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cats.models import Cat, Rating
+
+
+def seed_owners(count, breed, judge):
+    '''Adds count owners with two cats of breed each, every cat rated once by judge.'''
+    cats = []
+    for _ in range(count):
+        owner = User.objects.create_user(username=f'owner{User.objects.count()}')
+        for name in ('Tom', 'Cathy'):
+            cat = Cat.objects.create(name=name, age=12, color='grey', breed=breed, owner=owner)
+            Rating.objects.create(user=judge, cat=cat, value=8)
+            cats.append(cat)
+    return cats
+
+
+class QueryBudgetMixin:
+    '''
+    assertScalableQueries() runs a request once per dataset size. The request must issue the
+    same number of queries at every size, and no more than its budget. A failure prints the
+    SQL of every run, so a field that queries per row shows up at once.
+    '''
+
+    sizes = (1, 10)
+
+    def assertScalableQueries(self, seed, request, budget):
+        '''
+        seed(size) adds the data of the next size. request(size) sends the request and returns
+        the response, the response cache is cleared before so the view itself is measured.
+        Operations without an endpoint return None instead.
+        '''
+        runs = []
+        for size in self.sizes:
+            seed(size)
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = request(size)
+                # A streamed response only queries while it is consumed.
+                if response is not None and response.streaming:
+                    b''.join(response.streaming_content)
+            if response is not None:
+                self.assertLess(response.status_code, 400, getattr(response, 'data', response))
+            runs.append((size, context.captured_queries))
+
+        counts = [len(queries) for size, queries in runs]
+        if len(set(counts)) == 1 and counts[0] <= budget:
+            return
+        report = [f'Issued {counts} queries for the dataset sizes {self.sizes}, the budget is {budget}.']
+        for size, queries in runs:
+            report.append(f'\nSize {size}, {len(queries)} queries:')
+            report.extend(f'{number}. {query["sql"]}' for number, query in enumerate(queries, 1))
+        self.fail('\n'.join(report))
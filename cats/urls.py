@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 
 urlpatterns = [
@@ -8,8 +8,18 @@ urlpatterns = [
     path('users/', views.UserList.as_view(), name='user-list'),
     path('breeds/', views.BreedList.as_view(), name='breed-list'),
     path('cats/', views.CatList.as_view(), name='cat-list'),
+    path('cats/top/', views.TopCats.as_view(), name='cat-top'),
+    path('cats/search/', views.CatSearch.as_view(), name='cat-search'),
     path('cats/breed/<int:breed_id>', views.CatListByBreed.as_view(), name='cat-list-by-breed'),
     path('cat/details/<int:pk>', views.CatDetails.as_view(), name='cat-details'),
     path('cat/add/', views.AddCat.as_view(), name='add-cat'),
+    path('cat/add/bulk/', views.AddCats.as_view(), name='add-cats'),
     path('cat/rate/', views.Rate.as_view(), name='rate-cat'),
+    path('cat/rate/batch/', views.RateBatch.as_view(), name='rate-cats'),
+    path('export/<str:table>/', views.ExportTable.as_view(), name='export-table'),
+    path('async/breeds/', async_views.breed_list, name='async-breed-list'),
+    path('async/cats/', async_views.cat_list, name='async-cat-list'),
+    path('async/cats/breed/<int:breed_id>', async_views.cat_list_by_breed, name='async-cat-list-by-breed'),
+    path('async/cat/details/<int:pk>', async_views.cat_details, name='async-cat-details'),
+    path('cats/ratings/stream/', async_views.rating_stream, name='rating-stream'),
 ]
\ No newline at end of file
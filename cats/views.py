@@ -3,19 +3,36 @@ from rest_framework import generics
 from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
-from .serializers import CatSerializer, BreedSerializer, UserSerializer, RegisterSerializer, RatingSerializer
+from rest_framework.exceptions import ValidationError
+from .serializers import (
+    CatSerializer,
+    BreedSerializer,
+    UserSerializer,
+    RegisterSerializer,
+    RatingSerializer,
+    RatingBatchSerializer,
+)
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from .models import Breed, Cat
 
 from django.shortcuts import get_object_or_404
+from .breeds import breed_resolver
+from .cache import CachedResponseMixin, ConditionalGetMixin, cat_list_version
+from .filters import CatFilter, CatOrderingFilter
+from .exports import EXPORT_FORMATS, EXPORT_TABLES, stream_export, stream_json_array
+from .pagination import IdCursorPagination, SearchPagination
 from .permissions import IsOwnerOrReadOnly
 
 from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
     OpenApiExample,
+    OpenApiParameter,
     OpenApiResponse,
 
 )
@@ -51,7 +68,8 @@ class RegisterUser(APIView):
 @extend_schema_view(
     get=extend_schema(
         summary="User list",
-        description="Returns the list of all existing users.",
+        description="Returns the list of all existing users. The list is paginated with a cursor, "
+        "page_size sets the number of users per page.",
         examples=[
             OpenApiExample(
                 name='/api/users/',
@@ -68,15 +86,20 @@ class RegisterUser(APIView):
         ]
     )
 )
-class UserList(generics.ListAPIView):
-    queryset = User.objects.prefetch_related('ownership')
+class UserList(CachedResponseMixin, generics.ListAPIView):
+    queryset = User.objects.prefetch_related(
+        Prefetch('ownership', queryset=Cat.objects.with_listing_data())
+    )
     serializer_class = UserSerializer
+    pagination_class = IdCursorPagination
+    cache_namespaces = ('users', 'cats')
 
 
 @extend_schema_view(
     get=extend_schema(
         summary='Breed list',
-        description="Returns the list of all existing breeds.",
+        description="Returns the list of all existing breeds. The response carries an ETag, "
+        "send it back in If-None-Match to get a 304 while the breeds are unchanged.",
         examples=[
             OpenApiExample(
                 name='/api/breeds/',
@@ -85,15 +108,22 @@ class UserList(generics.ListAPIView):
         ]
     )
 )
-class BreedList(generics.ListAPIView):
+class BreedList(CachedResponseMixin, generics.ListAPIView):
     queryset = Breed.objects.all()
     serializer_class = BreedSerializer
+    cache_namespaces = ('breeds',)
 
 @extend_schema_view(
     get=extend_schema(
         summary='Cat list',
-            description='Returns the list of all existing cats.',
+            description='Returns the list of all existing cats. The list is paginated with a cursor, '
+            'page_size sets the number of cats per page. The cats can be filtered by breed, age, '
+            'color, owner and average rating and sorted with ordering. With stream=1 the whole '
+            'selection is streamed as a single JSON array instead.',
             request=CatSerializer,
+            parameters=[
+                OpenApiParameter('stream', bool, description='Stream every cat as one JSON array.')
+            ],
             responses={
                 200: CatSerializer,
                 204: OpenApiResponse(description='There are no cats yet.')
@@ -114,24 +144,42 @@ class BreedList(generics.ListAPIView):
             ]
     )
 )
-class CatList(generics.ListAPIView):
-    queryset = Cat.objects.all()
+class CatList(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
+    queryset = Cat.objects.with_listing_data()
     serializer_class = CatSerializer
+    pagination_class = IdCursorPagination
+    filter_backends = [CatOrderingFilter, CatFilter]
+    cache_namespaces = ('cats',)
+
+    def get_resource_version(self):
+        return cat_list_version(Cat.objects.all())
 
     def list(self, request, *args, **kwargs):
-        queryset = Cat.objects.all()
+        if request.query_params.get('stream') in ('1', 'true'):
+            queryset = self.filter_queryset(self.get_queryset())
+            # Without ?ordering the pagination class orders the pages, the stream orders itself.
+            if not queryset.ordered:
+                queryset = queryset.order_by('id')
+            return StreamingHttpResponse(
+                stream_json_array(queryset, self.get_serializer()),
+                content_type='application/json'
+            )
+
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
 
-        if not queryset:
+        # Only the unfiltered first page can tell that there are no cats at all.
+        if not page and self.paginator.cursor is None and not CatFilter.is_filtered(request):
             return Response({'msg': 'There are no cats yet.'})
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 @extend_schema_view(
     get=extend_schema(
         summary='Cat list by breed',
-        description='Returns the list of all cats with specified breed ID.',
+        description='Returns the list of all cats with specified breed ID. The list is paginated '
+        'with a cursor, page_size sets the number of cats per page.',
         request=CatSerializer,
         responses={
             200: CatSerializer,
@@ -153,12 +201,77 @@ class CatList(generics.ListAPIView):
         ]
     )
 )
-class CatListByBreed(generics.ListAPIView):
+class CatListByBreed(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
     serializer_class = CatSerializer
+    pagination_class = IdCursorPagination
+    cache_namespaces = ('cats',)
+
+    def get_resource_version(self):
+        return cat_list_version(Cat.objects.filter(breed_id=self.kwargs['breed_id']))
 
     def get_queryset(self):
         breed = get_object_or_404(Breed, id=self.kwargs['breed_id'])
-        return Cat.objects.filter(breed=breed)
+        return Cat.objects.with_listing_data().filter(breed=breed)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary='Top rated cats',
+        description='Returns the best rated cats, highest average rating first. Cats without '
+        'ratings are left out.',
+        parameters=[
+            OpenApiParameter('limit', int, description='Number of cats, 10 by default.'),
+            OpenApiParameter('breed', int, description='Only rank the cats of the breed with this ID.')
+        ],
+        responses={
+            200: CatSerializer(many=True)
+        }
+    )
+)
+class TopCats(CachedResponseMixin, generics.ListAPIView):
+    serializer_class = CatSerializer
+    cache_namespaces = ('cats',)
+
+    def get_queryset(self):
+        queryset = Cat.objects.with_listing_data().top_rated()
+        breed = self.request.query_params.get('breed', '')
+        if breed and not breed.isdigit():
+            raise ValidationError({'breed': 'A valid integer is required.'})
+        if breed:
+            queryset = queryset.filter(breed_id=breed)
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = settings.API_LEADERBOARD_SIZE
+        return queryset[:min(max(limit, 1), settings.API_MAX_PAGE_SIZE)]
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary='Search cats',
+        description='Full-text search over the name, breed, color and description of the cats, '
+        'best matches first. Names also match with small typos.',
+        parameters=[
+            OpenApiParameter('q', str, required=True, description='Search terms, "quoted phrases" '
+            'and -excluded words are supported.'),
+            OpenApiParameter('limit', int, description='Number of results per page.'),
+            OpenApiParameter('offset', int, description='Number of results to skip.')
+        ],
+        responses={
+            200: CatSerializer(many=True)
+        }
+    )
+)
+class CatSearch(CachedResponseMixin, generics.ListAPIView):
+    serializer_class = CatSerializer
+    pagination_class = SearchPagination
+    cache_namespaces = ('cats',)
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This query parameter is required.'})
+        return Cat.objects.with_listing_data().search(query)
 
 
 @extend_schema_view(
@@ -193,6 +306,41 @@ class AddCat(generics.CreateAPIView):
         serializer.save(owner=self.request.user)
 
 
+@extend_schema_view(
+    post=extend_schema(
+        summary='Create several cats',
+        description='Creates a list of cats in one transaction. Every item takes the same fields as '
+        '/api/cat/add/. If any item is invalid nothing is created and the response holds the errors '
+        'of each item in request order.',
+        request=CatSerializer(many=True),
+        responses={
+            201: CatSerializer(many=True),
+            400: OpenApiResponse(description='Validation errors of each item.')
+        },
+        examples=[
+            OpenApiExample(
+                name='/api/cat/add/bulk/',
+                value=[
+                    {'name': 'Sam', 'age': 57, 'color': 'grey', 'breed': 'scottish fold'},
+                    {'name': 'Kate', 'age': 12, 'color': 'white', 'breed': 'siamese'}
+                ],
+                request_only=True
+            )
+        ]
+    )
+)
+class AddCats(generics.CreateAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = CatSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(many=True, allow_empty=False, max_length=settings.API_BULK_MAX_ITEMS)
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
 @extend_schema_view(
     get=extend_schema(
         summary='Get details',
@@ -220,23 +368,31 @@ class AddCat(generics.CreateAPIView):
         }
     )
 )
-class CatDetails(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Cat.objects.all()
+class CatDetails(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Cat.objects.with_listing_data()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     serializer_class = CatSerializer
+
+    def get_cache_namespaces(self):
+        return (f'cat:{self.kwargs["pk"]}',)
+
+    def get_resource_version(self):
+        updated_at = Cat.objects.filter(pk=self.kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return updated_at, updated_at.isoformat()
     
     def update(self, request, *args, **kwargs):
         breed_name = request.data.get('breed')
         cat = self.get_object()
 
         if breed_name:
-            breed, created = Breed.objects.get_or_create(name=breed_name)
-            cat.breed = breed
+            cat.breed = breed_resolver.resolve(breed_name)
 
         request_data = request.data.copy()
         request_data.pop('breed', None)
 
-        serializer = self.get_serializer(cat, data=request.data, partial=True)
+        serializer = self.get_serializer(cat, data=request_data, partial=True)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
 
@@ -253,3 +409,79 @@ class Rate(APIView):
             return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+
+class RateBatch(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary='Rate several cats',
+        description='Rates a list of cats in one request. With mode "skip" (default) the cats '
+        'already rated by the user are reported as duplicates, with mode "update" their rating is '
+        'replaced. Every item gets an accepted, updated, duplicate or invalid status.',
+        request=RatingBatchSerializer,
+        responses={
+            202: OpenApiResponse(description='The status of each item in request order.'),
+            400: OpenApiResponse(description='Validation error.')
+        },
+        examples=[
+            OpenApiExample(
+                name='Request example',
+                value={'mode': 'skip', 'ratings': [{'cat': 1, 'value': 8.5}, {'cat': 2, 'value': 7}]},
+                request_only=True
+            ),
+            OpenApiExample(
+                name='Response example',
+                value={'results': [{'cat': 1, 'status': 'accepted'}, {'cat': 2, 'status': 'duplicate'}]},
+                response_only=True
+            )
+        ],
+    )
+    def post(self, request):
+        serializer = RatingBatchSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            results = serializer.save()
+            return Response({'results': results}, status=status.HTTP_202_ACCEPTED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary='Export a table',
+        description='Streams the breeds, cats or ratings table as newline-delimited JSON or CSV. '
+        'Pass since_id to export only the rows added after the last sync. Admin only.',
+        parameters=[
+            OpenApiParameter('output', str, enum=EXPORT_FORMATS, description='ndjson (default) or csv.'),
+            OpenApiParameter('since_id', int, description='Export rows with a greater ID only.')
+        ],
+        responses={
+            200: OpenApiResponse(description='The exported rows.'),
+            400: OpenApiResponse(description='Unknown output format or invalid since_id.'),
+            404: OpenApiResponse(description='Unknown table.')
+        }
+    )
+)
+class ExportTable(APIView):
+    permission_classes = [IsAdminUser]
+    content_types = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+    def get(self, request, table):
+        if table not in EXPORT_TABLES:
+            return Response({'msg': f'Unknown table {table}.'}, status=status.HTTP_404_NOT_FOUND)
+
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'msg': f'Unknown output format {export_format}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        since_id = request.query_params.get('since_id')
+        if since_id is not None:
+            try:
+                since_id = int(since_id)
+            except ValueError:
+                return Response({'msg': 'since_id must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            stream_export(table, export_format, since_id),
+            content_type=self.content_types[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{table}.{export_format}"'
+        return response
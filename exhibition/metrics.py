@@ -0,0 +1,108 @@
+"""
+Prometheus metrics of the exhibition, served at /metrics.
+
+The counters and histograms live in the process that records them. Under gunicorn every
+worker is a separate process, so PROMETHEUS_MULTIPROC_DIR must point to a directory shared
+by the workers (gunicorn.conf.py empties it on start): each process then writes its values
+to memory mapped files there and /metrics adds up the files of all workers. Without the
+variable the values of the serving process are exported.
+
+/metrics is not public: see METRICS_ALLOWED_IPS and METRICS_TOKEN in the settings.
+
+Hit ratios are left to the queries, e.g.
+    rate(exhibition_cache_requests_total{result="hit"}[5m])
+    / ignoring(result) sum without(result) (rate(exhibition_cache_requests_total[5m]))
+"""
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+REQUESTS = Counter(
+    'exhibition_http_requests_total', 'Requests handled, by view, method and status.',
+    ['view', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'exhibition_http_request_duration_seconds', 'Wall time of the requests, by view.',
+    ['view'], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+DB_QUERIES = Histogram(
+    'exhibition_db_queries_per_request', 'Database queries issued by a request, by view.',
+    ['view'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+JWT_AUTHENTICATION = Histogram(
+    'exhibition_jwt_authentication_seconds', 'Time spent authenticating JWT access tokens.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+RATINGS = Counter('exhibition_ratings_created_total', 'Ratings stored, batch ratings included.')
+CACHE_REQUESTS = Counter(
+    'exhibition_cache_requests_total', 'Cache lookups, by cache and result (hit or miss).',
+    ['cache', 'result']
+)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    # Unknown URLs share one label, the label values must stay a small fixed set.
+    return match.view_name if match is not None else 'unmatched'
+
+
+def observe_request(request, response, duration, queries):
+    view = view_name(request)
+    REQUESTS.labels(view, request.method, response.status_code).inc()
+    REQUEST_LATENCY.labels(view).observe(duration)
+    DB_QUERIES.labels(view).observe(queries)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_ratings(count=1):
+    if count:
+        RATINGS.inc(count)
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    '''JWTAuthentication that records how long checking the token and loading the user takes.'''
+
+    def authenticate(self, request):
+        if self.get_header(request) is None:
+            # Anonymous request, nothing to measure.
+            return None
+        started = time.perf_counter()
+        try:
+            return super().authenticate(request)
+        finally:
+            JWT_AUTHENTICATION.observe(time.perf_counter() - started)
+
+
+def metrics_allowed(request):
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    # Headers arrive decoded as latin-1, compare_digest() refuses non-ASCII str.
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').encode('latin-1')
+    return bool(settings.METRICS_TOKEN) and hmac.compare_digest(token, settings.METRICS_TOKEN.encode())
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        raise Http404
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
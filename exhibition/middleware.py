@@ -0,0 +1,141 @@
+"""
+Per request performance figures.
+
+PerformanceMiddleware measures the wall time of every request, the number and the time of
+its database queries and the time spent in the serializers. They are sent back in the
+Server-Timing header, so the browser's network panel shows them, and logged as one JSON
+line on the exhibition.performance logger. Requests slower than PERF_SLOW_REQUEST_MS or
+issuing more than PERF_MAX_QUERIES queries are logged as warnings along with their SQL.
+The same figures feed the per view Prometheus metrics of exhibition.metrics.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from .metrics import observe_request
+
+logger = logging.getLogger('exhibition.performance')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # The connection.execute_wrapper() hook, sees every query of the request.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_time += duration
+            self.queries.append((sql, duration))
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        return ', '.join([
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{len(self.queries)} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+        ])
+
+    def as_dict(self, request, response):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(self.total * 1000, 1),
+            'db_ms': round(self.db_time * 1000, 1),
+            'queries': len(self.queries),
+            'serializer_ms': round(self.serializer_time * 1000, 1),
+        }
+
+
+@contextmanager
+def timed_serialization():
+    '''Adds the time spent in the block to the serializer time of the current request.'''
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+def _install_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def _remove_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.process(request, response, metrics)
+
+    async def __acall__(self, request):
+        # Connections belong to threads, the queries of an async request run in its
+        # thread sensitive executor, so the wrapper is installed on that thread's connection.
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        await sync_to_async(_install_wrapper)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_wrapper)(metrics)
+            _current.reset(token)
+        return self.process(request, response, metrics)
+
+    def process(self, request, response, metrics):
+        metrics.finish()
+        observe_request(request, response, metrics.total, len(metrics.queries))
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+
+        record = metrics.as_dict(request, response)
+        slow = metrics.total * 1000 > settings.PERF_SLOW_REQUEST_MS
+        chatty = len(metrics.queries) > settings.PERF_MAX_QUERIES
+        if slow or chatty:
+            record['slow'] = slow
+            record['too_many_queries'] = chatty
+            record['sql'] = [
+                {'ms': round(duration * 1000, 1), 'sql': sql} for sql, duration in metrics.queries
+            ]
+            logger.warning(json.dumps(record), extra={'performance': record})
+        else:
+            logger.info(json.dumps(record), extra={'performance': record})
+        return response
@@ -0,0 +1,61 @@
+"""
+JSON renderer and parser backed by orjson, the REST_FRAMEWORK defaults.
+
+orjson encodes a list of thousands of cats several times faster than the json module and
+with far fewer temporary objects. The output matches DRF's JSONRenderer: compact UTF-8,
+\\u2028 and \\u2029 escaped, and types orjson doesn't know (lazy strings, Decimal, ...)
+converted by DRF's JSONEncoder. Pretty printing (an indent in the Accept header or the
+browsable API) and installs without orjson use the stdlib implementation.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_default = JSONEncoder().default
+
+
+def dumps(data):
+    '''Compact JSON bytes of data.'''
+    content = orjson.dumps(
+        data, default=_default,
+        # Keep DRF's date format for datetimes that reach the renderer unserialized.
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+    # Keep the output a strict JavaScript subset like JSONRenderer does.
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        # orjson takes UTF-8 only, which is all JSON bodies are in practice.
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
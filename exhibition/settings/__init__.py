@@ -0,0 +1,7 @@
+"""
+Settings of the exhibition project.
+
+exhibition.settings is the development setup. Production runs with
+DJANGO_SETTINGS_MODULE=exhibition.settings.production, see production.py.
+"""
+from .base import *  # noqa: F401,F403
@@ -1,5 +1,5 @@
 """
-Django settings for exhibition project.
+Django settings for exhibition project shared by every environment.
 
 Generated by 'django-admin startproject' using Django 5.1.1.
 
@@ -9,11 +9,12 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 
 # Quick-start development settings - unsuitable for production
@@ -41,9 +42,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 MIDDLEWARE = [
+    'exhibition.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,14 +90,75 @@ WSGI_APPLICATION = 'exhibition.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
-        'USER': 'postgres',
-        'PASSWORD': 'postgres',
-        'HOST': 'pgdb',
-        'PORT': 5432,
+        'NAME': os.environ.get('POSTGRES_DB', 'postgres'),
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'postgres'),
+        'HOST': os.environ.get('POSTGRES_HOST', 'pgdb'),
+        'PORT': int(os.environ.get('POSTGRES_PORT', 5432)),
+        # Reuse a connection for DB_CONN_MAX_AGE seconds instead of a new handshake per request,
+        # checking that it is still usable before the first query of each request. WSGI only,
+        # see the SERVER_MODE=asgi rule below.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# DB_ENGINE=sqlite runs on a local SQLite file instead, for benchmarks and development
+# without a database server. Full-text search falls back to substring matching there.
+if os.environ.get('DB_ENGINE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+# DB_POOL=1 replaces the persistent connections with a psycopg connection pool in every
+# worker process. The pool is sized for the threads of one gunicorn worker by default.
+elif os.environ.get('DB_POOL') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', os.environ.get('GUNICORN_THREADS', 4))),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    }
+# Never persistent connections under ASGI (SERVER_MODE=asgi): every request runs on a
+# thread of its own, so its connection is neither reused nor closed and they pile up until
+# PostgreSQL refuses new ones. Use DB_POOL=1 to reuse connections there.
+elif os.environ.get('SERVER_MODE') == 'asgi':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Shared by every worker when REDIS_URL is set, otherwise a file based cache in CACHE_DIR
+# or a per-process local memory cache, for development and tests only: production.py
+# refuses it.
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -139,11 +203,63 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson backed JSON, see exhibition/renderers.py.
+    'DEFAULT_RENDERER_CLASSES': (
+        'exhibition.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'exhibition.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'exhibition.metrics.TimedJWTAuthentication',
     )
 }
 
+# Page size of the cursor paginated list endpoints, clients may ask for up to the maximum
+# with the page_size query parameter.
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+# Default number of cats on the /api/cats/top/ leaderboard.
+API_LEADERBOARD_SIZE = 10
+
+# Number of rows fetched and encoded at once by the streaming catalogue export.
+API_STREAM_CHUNK_SIZE = 2000
+
+# Largest number of items accepted by the bulk endpoints in one request.
+API_BULK_MAX_ITEMS = 100
+
+# Number of breed names kept by the per-process breed resolver cache.
+BREED_CACHE_SIZE = 256
+
+# Per request timings of exhibition.middleware.PerformanceMiddleware. Requests slower than
+# PERF_SLOW_REQUEST_MS milliseconds or issuing more than PERF_MAX_QUERIES queries are logged
+# with their SQL.
+PERF_SERVER_TIMING = os.environ.get('PERF_SERVER_TIMING', '1') == '1'
+PERF_SLOW_REQUEST_MS = int(os.environ.get('PERF_SLOW_REQUEST_MS', 500))
+PERF_MAX_QUERIES = int(os.environ.get('PERF_MAX_QUERIES', 20))
+
+# /metrics answers the addresses in METRICS_ALLOWED_IPS (comma separated, loopback by
+# default) and requests carrying "Authorization: Bearer <METRICS_TOKEN>" when a token is set,
+# everyone else gets a 404. Scrapers in another container need the token or their address.
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# How rating events reach the live streams of the other workers: 'local' (this process
+# only, the development default), 'redis' or 'postgres', see cats/events.py. production.py
+# defaults to a shared one. A stream keeps at most
+# RATING_EVENTS_QUEUE_SIZE undelivered events and sends a keepalive comment after
+# RATING_EVENTS_KEEPALIVE idle seconds.
+RATING_EVENTS_BACKEND = os.environ.get('RATING_EVENTS_BACKEND', 'local')
+RATING_EVENTS_QUEUE_SIZE = 100
+RATING_EVENTS_KEEPALIVE = 15
+
+# Seconds a cached API response is kept, they are invalidated on every change anyway.
+API_CACHE_TIMEOUT = 60 * 60
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Cat Management API',                               
     'DESCRIPTION': 'API for accessing, editing, deleting details about cats presented at the exhibition.',  
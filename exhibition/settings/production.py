@@ -0,0 +1,67 @@
+"""
+Production settings of the exhibition project.
+
+Served by gunicorn, see gunicorn.conf.py. DEBUG is off, so Django no longer keeps
+every executed SQL query in memory, and the API renders JSON only.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, CACHES, DATABASES, REDIS_URL, REST_FRAMEWORK, SIMPLE_JWT
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# The cached responses and their versions must be shared by every gunicorn worker, with a
+# per-process cache a write only invalidates the worker that handled it.
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured('The production settings need a shared cache, set REDIS_URL or CACHE_DIR.')
+
+# The rating streams of every worker must see the ratings posted to the others, see
+# cats/events.py. Only the SQLite benchmark setup has no channel to share and keeps the
+# events per worker.
+RATING_EVENTS_BACKEND = os.environ.get('RATING_EVENTS_BACKEND', (
+    'redis' if REDIS_URL
+    else 'local' if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3'
+    else 'postgres'
+))
+
+# No browsable API renderer.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': (
+        'exhibition.renderers.FastJSONRenderer',
+    ),
+}
+
+SIMPLE_JWT = {
+    **SIMPLE_JWT,
+    'SIGNING_KEY': SECRET_KEY,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        # Never log SQL in production, whatever DJANGO_LOG_LEVEL is.
+        'django.db.backends': {
+            'level': 'WARNING',
+        },
+    },
+}
@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration of the production server, every setting can be overridden
+from the environment:
+
+    DJANGO_SETTINGS_MODULE=exhibition.settings.production gunicorn --config gunicorn.conf.py
+
+SERVER_MODE=wsgi (default) serves exhibition/wsgi.py with threaded sync workers,
+SERVER_MODE=asgi serves exhibition/asgi.py with uvicorn workers.
+
+With PROMETHEUS_MULTIPROC_DIR set the workers share their metrics through that directory,
+see exhibition/metrics.py.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Recycle workers now and then so a leak can't grow forever.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'exhibition.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'exhibition.wsgi:application'
+    worker_class = 'gthread' if threads > 1 else 'sync'
+
+# An empty GUNICORN_ACCESS_LOG turns the access log off.
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+
+
+def on_starting(server):
+    # Values of a previous run must not be added to the new ones.
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)